@@ -0,0 +1,65 @@
+"""Anonymized copies of schedule data, to collect a corpus of production schedules
+
+benchmarks.corpus replays the captured schedules.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+import pytz
+
+MONDAY = 1602460800 # 2020-10-12 00:00 UTC
+
+def anonymize(jsondata: dict) -> dict:
+    """Copy the schedule data with the emails, wiw_ids and positions replaced by
+    sequential ids in input order, and the timestamps shifted by whole weeks
+    of the schedule's timezone, so that the first shift is in the week of MONDAY.
+    The local dates and times are kept, even when the offset from UTC
+    of the captured week and of the week of MONDAY differ.
+    Nothing of the replaced values is kept, so they can't be recovered from the copy,
+    and the same input always gives the same copy.
+    Only the fields data.load_data uses are kept.
+    Args:
+        jsondata: data.load_data compatible dict
+    Returns:
+        data.load_data compatible dict
+    """
+    timezone = pytz.timezone(jsondata['timezone'])
+    def local(timestamp) -> datetime:
+        return datetime.fromtimestamp(int(float(timestamp)), timezone).replace(tzinfo=None)
+    first_begin = min(local(s['begin']) for s in jsondata['shifts'])
+    offset = timedelta(weeks=(first_begin.date() - datetime.utcfromtimestamp(MONDAY).date()).days // 7)
+    def shifted(timestamp) -> int:
+        return int(timezone.localize(local(timestamp) - offset).timestamp())
+    positions = dict() # positions[position] = sequential id, in order of first appearance
+    def position_id(position) -> int:
+        return positions.setdefault(position, len(positions) + 1)
+    shifts = [{
+        'id': s['id'],
+        'begin': shifted(s['begin']),
+        'end': shifted(s['end']),
+        'capacity': s['capacity'],
+        'position': position_id(s['position']),
+    } for s in jsondata['shifts']]
+    users = [{
+        'email': f'user{i}@example.com',
+        'hours_adjusted': u['hours_adjusted'],
+        'hours_max': u['hours_max'],
+        'wiw_id': i,
+        'positions': [position_id(p) for p in u['positions']],
+        'preferences': u['preferences'],
+    } for i, u in enumerate(jsondata['users'], start=1)]
+    return {'shifts': shifts, 'timezone': jsondata['timezone'], 'users': users}
+
+def capture(jsondata: dict, directory: str) -> Path:
+    """Write an anonymized copy of the schedule data to the corpus directory,
+    named by the hash of its content, so capturing the same schedule again doesn't duplicate it.
+    Returns:
+        the path of the captured file
+    """
+    content = json.dumps(anonymize(jsondata), sort_keys=True)
+    path = Path(directory) / f'{hashlib.sha256(content.encode()).hexdigest()[:16]}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+    return path
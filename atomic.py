@@ -0,0 +1,26 @@
+"""Atomic writes to directories shared between processes"""
+import os
+import tempfile
+from pathlib import Path
+
+def write_atomic(path: Path, data: bytes):
+    """Write data to path, so that readers see either the old or the new file.
+    Each writer writes its own temporary file, then renames it over path.
+    A rename lost to a concurrent writer of the same path counts as written,
+    as that writer's file replaces this one anyway.
+    """
+    fd, partial = tempfile.mkstemp(dir=path.parent, prefix=f'{path.stem}.', suffix='.partial')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            os.replace(partial, path)
+        except OSError:
+            if not path.exists():
+                raise
+            # Another writer renamed its file over path meanwhile, e.g. on Windows
+    finally:
+        try:
+            os.unlink(partial)
+        except FileNotFoundError:
+            pass # Renamed
@@ -0,0 +1,10 @@
+"""Benchmarks for the shift optimizer
+
+Run them from the root of the repository, e.g.
+    python -m benchmarks.encodings schedule.json
+    python -m benchmarks.generate schedule.json --users 100
+    python -m benchmarks.scaling results.json --compare old_results.json
+    python -m benchmarks.corpus corpus/
+    python -m benchmarks.tuning corpus/ -o params.json
+    python -m benchmarks.delta
+"""
@@ -0,0 +1,65 @@
+"""Corpus of anonymized production schedules, and replaying them
+
+generate_assignments.py --capture DIR writes an anonymized copy of its input to DIR, see anonymize.
+Replay solves every captured schedule with a fixed seed and number of search workers:
+    python -m benchmarks.corpus DIR [-c 96] [-t 60] [-f] [--seed 0] [--workers 8] [-o results.json]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+import data
+from solver import ShiftSolver, ENCODINGS
+
+def replay(path: Path, capacities: float, timeout: int, force_available: bool = False,
+        seed: int = 0, workers: int = 8, encoding: str = 'pairwise', parameters: dict = None) -> dict:
+    """Solve a captured schedule with a fixed seed and number of search workers
+    Args:
+        parameters: further CP-SAT parameters, see ShiftSolver.SetParameters
+    Returns:
+        dict of the measurements
+    """
+    with open(path) as f:
+        schedule = data.load_data(json.load(f))
+    if force_available:
+        schedule.add_forced_availabilities()
+    n = int(sum(s.capacity for s in schedule.shifts) * (capacities / 100))
+    solver = ShiftSolver(schedule, parameters={'random_seed': seed, 'num_search_workers': workers, **(parameters or {})})
+    begin = time.perf_counter()
+    solver.BuildModel(n, encoding)
+    build_time = time.perf_counter() - begin
+    found = solver.SolveLevel(n, timeout=timeout)
+    return {
+        'instance': path.name,
+        'min_capacities_filled': n,
+        'build_time': build_time,
+        'solve_time': solver.WallTime(),
+        'status': solver.StatusName(),
+        'objective': solver.ObjectiveValue() if found else None,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='The corpus directory with the captured .json files.')
+    parser.add_argument('-c', '--capacities', default=96.0, type=float,
+                        help='The percentage of capacities to fill as a minimum')
+    parser.add_argument('-t', '--timeout', default=60, type=int,
+                        help='The maximum time in seconds for each solve.')
+    parser.add_argument('-f', '--force-availabilities', dest='force_available', action='store_true',
+                        help='Extend shift availability for every position for each user.')
+    parser.add_argument('--seed', default=0, type=int, help='Random seed of CP-SAT.')
+    parser.add_argument('--workers', default=8, type=int, help='Number of CP-SAT search workers.')
+    parser.add_argument('--encoding', choices=ENCODINGS, default='pairwise',
+                        help='How to encode that no one can take conflicting shifts.')
+    parser.add_argument('-o', '--output', default=None, help='Path to write the results as .json to.')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"instance":<24}{"build (s)":>11}{"solve (s)":>11}  status    objective')
+    for path in sorted(Path(args.directory).glob('*.json')):
+        r = replay(path, args.capacities, args.timeout, args.force_available, args.seed, args.workers, args.encoding)
+        results.append(r)
+        print(f'{r["instance"]:<24}{r["build_time"]:>11.2f}{r["solve_time"]:>11.2f}  {r["status"]:<10}{r["objective"]}')
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'parameters': {k: v for k, v in vars(args).items() if k != 'output'}, 'results': results}, f, indent=4)
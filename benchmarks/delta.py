@@ -0,0 +1,94 @@
+"""Check that a model patched by ShiftSolver.SolveDelta solves like one rebuilt from scratch
+
+A delta removes a preference, adds one, changes a priority and changes a capacity.
+For each encoding, SolveDelta on the solved model has to reach the same status
+and optimal objective as a fresh ShiftSolver on the changed schedule.
+Exits with status 1 if they differ.
+
+Usage:
+    python -m benchmarks.delta [--file schedule.json | --users 12 --days 3 ...] [-c 50] [-t 60]
+"""
+import argparse
+import json
+import sys
+import data
+from models import Schedule
+from solver import ShiftSolver, ENCODINGS
+from benchmarks.generate import generate_schedule, add_arguments
+
+def make_delta(schedule: Schedule) -> dict:
+    """A delta of the first user with at least two preferences, and a shift without one:
+    their first preference removed, the priority of their second one changed,
+    a preference added for the first shift they had none for,
+    and the capacity of the first shift raised by one.
+    Returns:
+        keyword arguments of Schedule.apply_delta
+    """
+    for u in schedule.users:
+        user_shifts = schedule.shifts_of_user.get(u.id, [])
+        if len(user_shifts) >= 2 and len(user_shifts) < len(schedule.shifts):
+            break
+    else:
+        raise ValueError('No user has at least two preferences and a shift without one')
+    removed, changed = user_shifts[0], user_shifts[1]
+    taken = {s.id for s in user_shifts}
+    added = next(s for s in schedule.shifts if s.id not in taken)
+    first = schedule.shifts[0]
+    return {
+        'preferences': {u.id: {
+            removed.id: None,
+            changed.id: schedule.preference[changed.id, u.id] % 5 + 1,
+            added.id: 1,
+        }},
+        'shifts': {first.id: {'capacity': first.capacity + 1}},
+    }
+
+def check(jsondata: dict, min_capacities_filled: int, encoding: str, timeout: int) -> dict:
+    """Solve the schedule, apply the delta with SolveDelta, and solve the changed schedule from scratch
+    Returns:
+        dict of the status and objective of both, and whether they match
+    """
+    parameters = {'num_search_workers': 8, 'random_seed': 0}
+    patched = ShiftSolver(data.load_data(json.loads(json.dumps(jsondata))), parameters=parameters)
+    patched.Solve(min_capacities_filled, timeout=timeout, encoding=encoding)
+    delta = make_delta(patched.schedule)
+    patched.SolveDelta(timeout=timeout, **delta)
+    schedule = data.load_data(json.loads(json.dumps(jsondata)))
+    schedule.apply_delta(**delta)
+    rebuilt = ShiftSolver(schedule, parameters=parameters)
+    rebuilt.Solve(min_capacities_filled, timeout=timeout, encoding=encoding)
+    results = dict()
+    for name, solver in (('patched', patched), ('rebuilt', rebuilt)):
+        found = solver.StatusName() in ('FEASIBLE', 'OPTIMAL')
+        results[name] = {'status': solver.StatusName(), 'objective': solver.ObjectiveValue() if found else None}
+    results['match'] = (results['patched']['status'] == results['rebuilt']['status'] != 'FEASIBLE'
+        and results['patched']['objective'] == results['rebuilt']['objective'])
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=None, help='Path to the .json file with the schedule data, instead of generating one.')
+    add_arguments(parser)
+    parser.set_defaults(users=12, days=3, shifts_per_day=6)
+    parser.add_argument('-c', '--capacities', default=50.0, type=float,
+                        help='The percentage of capacities to fill as a minimum')
+    parser.add_argument('-t', '--timeout', default=60, type=int,
+                        help='The maximum time in seconds for each solve.')
+    args = parser.parse_args()
+
+    if args.file is None:
+        jsondata = generate_schedule(args.users, args.days, args.shifts_per_day, args.positions,
+            args.density, args.fulltimers, args.seed)
+    else:
+        with open(args.file, 'r') as f:
+            jsondata = json.load(f)
+    n = int(sum(s['capacity'] for s in jsondata['shifts']) * (args.capacities / 100))
+
+    ok = True
+    print(f'{"encoding":<10}  {"patched":<24}{"rebuilt":<24}')
+    for encoding in ENCODINGS:
+        r = check(jsondata, n, encoding, args.timeout)
+        ok = ok and r['match']
+        print(f'{encoding:<10}  ' + ''.join(f'{r[name]["status"] + " " + str(r[name]["objective"]):<24}' for name in ('patched', 'rebuilt'))
+            + ('' if r['match'] else 'MISMATCH'))
+    sys.exit(0 if ok else 1)
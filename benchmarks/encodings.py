@@ -0,0 +1,62 @@
+"""Compare the conflict encodings of ShiftModel on a schedule,
+by model size, build time and solve time.
+
+Usage:
+    python -m benchmarks.encodings schedule.json [-c 96] [-t 60] [-f]
+"""
+import argparse
+import json
+import time
+import data
+from solver import ShiftSolver, ENCODINGS, count_literals
+
+def model_size(solver: ShiftSolver) -> "tuple[int,int]":
+    """Count the constraints and the literals/variables referenced by them,
+    leaving out the ones cleared when they were replaced
+    """
+    constraints = [ct for ct in solver.Model.Proto().constraints if ct.WhichOneof('constraint') is not None]
+    return len(constraints), sum(count_literals(ct) for ct in constraints)
+
+def benchmark(schedule, min_capacities_filled: int, timeout: int, encodings=ENCODINGS) -> "list[dict]":
+    """Solve the schedule with each encoding
+    Returns:
+        list of dicts with the measurements for each encoding
+    """
+    results = []
+    for encoding in encodings:
+        solver = ShiftSolver(schedule)
+        begin = time.perf_counter()
+        solver.Solve(min_capacities_filled, timeout=timeout, encoding=encoding)
+        total_time = time.perf_counter() - begin
+        n_constraints, n_literals = model_size(solver)
+        results.append({
+            'encoding': encoding,
+            'constraints': n_constraints,
+            'literals': n_literals,
+            'build_time': total_time - solver.WallTime(),
+            'solve_time': solver.WallTime(),
+            'status': solver.StatusName(),
+            'objective': solver.ObjectiveValue() if solver.StatusName() in ('FEASIBLE', 'OPTIMAL') else None
+        })
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', help='Path to the .json file with the schedule data.')
+    parser.add_argument('-c', '--capacities', default=96.0, type=float,
+                        help='The percentage of capacities to fill as a minimum')
+    parser.add_argument('-t', '--timeout', default=60, type=int,
+                        help='The maximum time in seconds for each solve.')
+    parser.add_argument('-f', '--force-availabilities', dest='force_available', action='store_true',
+                        help='Extend shift availability for every position for each user.')
+    args = parser.parse_args()
+
+    with open(args.file, 'r') as f:
+        schedule = data.load_data(json.load(f))
+    if args.force_available:
+        schedule.add_forced_availabilities()
+    n = int(sum(s.capacity for s in schedule.shifts) * (args.capacities / 100))
+
+    print(f'{"encoding":<10}{"constraints":>12}{"literals":>10}{"build (s)":>11}{"solve (s)":>11}  status    objective')
+    for r in benchmark(schedule, n, args.timeout):
+        print(f'{r["encoding"]:<10}{r["constraints"]:>12}{r["literals"]:>10}{r["build_time"]:>11.2f}{r["solve_time"]:>11.2f}  {r["status"]:<10}{r["objective"]}')
@@ -0,0 +1,79 @@
+"""Generate synthetic schedules in the JSON format of data.load_data
+
+Usage:
+    python -m benchmarks.generate schedule.json [--users 50] [--days 7] [--shifts-per-day 10]
+        [--positions 2] [--density 0.35] [--fulltimers 0.2] [--seed 0]
+"""
+import argparse
+import json
+import random
+from anonymize import MONDAY
+HOUR = 60*60
+DAY = 24*HOUR
+
+def generate_schedule(users: int = 50, days: int = 7, shifts_per_day: int = 10, positions: int = 2,
+        density: float = 0.35, fulltimers: float = 0.2, seed: int = 0) -> dict:
+    """Generate a random schedule, reproducible from the seed.
+    Args:
+        users: number of users
+        days: number of days, starting on a Monday
+        shifts_per_day: number of shifts on each day, across the positions
+        positions: number of positions, each user can take one or more of them
+        density: the probability that a user has a preference for a shift of their positions
+        fulltimers: the ratio of fulltimers, who can only take long shifts
+        seed: seed of the random generator
+    Returns:
+        data.load_data compatible dict
+    """
+    rng = random.Random(seed)
+    position_ids = list(range(1, positions+1))
+    rshifts = []
+    for day in range(days):
+        for i in range(shifts_per_day):
+            begin = MONDAY + day*DAY + rng.randint(6, 18)*HOUR
+            rshifts.append({
+                'id': len(rshifts)+1,
+                'begin': begin,
+                'end': begin + rng.randint(4, 10)*HOUR,
+                'capacity': rng.randint(1, 3),
+                'position': position_ids[i % positions]
+            })
+    rusers = []
+    for i in range(users):
+        fulltimer = rng.random() < fulltimers
+        user_positions = sorted(rng.sample(position_ids, rng.randint(1, positions)))
+        rusers.append({
+            'email': f'user{i}@example.com',
+            'hours_adjusted': 40 if fulltimer else rng.choice([10, 15, 20]),
+            'hours_max': 40 if fulltimer else 20,
+            'wiw_id': 1000+i,
+            'positions': user_positions,
+            'preferences': {
+                str(s['id']): rng.randint(1, 5) for s in rshifts
+                if s['position'] in user_positions and rng.random() < density
+            }
+        })
+    return {'shifts': rshifts, 'timezone': 'Europe/Budapest', 'users': rusers}
+
+def add_arguments(parser: argparse.ArgumentParser, users: bool = True):
+    """Add the generate_schedule parameters to a command line parser"""
+    if users:
+        parser.add_argument('--users', default=50, type=int, help='Number of users.')
+    parser.add_argument('--days', default=7, type=int, help='Number of days.')
+    parser.add_argument('--shifts-per-day', dest='shifts_per_day', default=10, type=int,
+                        help='Number of shifts on each day, across the positions.')
+    parser.add_argument('--positions', default=2, type=int, help='Number of positions.')
+    parser.add_argument('--density', default=0.35, type=float,
+                        help='Probability that a user has a preference for a shift of their positions.')
+    parser.add_argument('--fulltimers', default=0.2, type=float, help='Ratio of fulltimers.')
+    parser.add_argument('--seed', default=0, type=int, help='Seed of the random generator.')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', help='Path to write the .json file with the schedule data to.')
+    add_arguments(parser)
+    args = parser.parse_args()
+    schedule = generate_schedule(args.users, args.days, args.shifts_per_day, args.positions,
+        args.density, args.fulltimers, args.seed)
+    with open(args.file, 'w') as f:
+        json.dump(schedule, f)
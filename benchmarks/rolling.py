@@ -0,0 +1,66 @@
+"""Compare the rolling-horizon solve with the monolithic one,
+on a schedule file or on a generated multi-week schedule.
+
+Usage:
+    python -m benchmarks.rolling [--file schedule.json | --days 28 --users 50 ...] [-c 80] [-t 60]
+        [--window 7] [--step 3]
+"""
+import argparse
+import json
+import time
+import data
+from solver import ShiftSolver, ENCODINGS
+from rolling import solve_rolling
+from benchmarks.generate import generate_schedule, add_arguments
+
+def compare(schedule, min_capacities_filled: int, timeout: int, window: int, step: int, encoding: str = 'pairwise') -> dict:
+    """Solve the schedule monolithically and in windows
+    Returns:
+        dict of the measurements of both, and the gap of the stitched objective
+    """
+    solver = ShiftSolver(schedule)
+    begin = time.perf_counter()
+    found = solver.Solve(min_capacities_filled, timeout=timeout, encoding=encoding)
+    monolithic_time = time.perf_counter() - begin
+    monolithic = solver.ObjectiveValue() if found else None
+    begin = time.perf_counter()
+    result = solve_rolling(schedule, min_capacities_filled, window, step, timeout=timeout, encoding=encoding)
+    rolling_time = time.perf_counter() - begin
+    stitched = result.PrefScore if result.found else None
+    gap = None
+    if monolithic is not None and stitched is not None and monolithic != 0:
+        gap = (stitched - monolithic) / abs(monolithic)
+    return {
+        'monolithic': {'status': solver.StatusName(), 'objective': monolithic, 'time': monolithic_time},
+        'rolling': {'status': result.StatusName(), 'objective': stitched, 'time': rolling_time, 'windows': result.windows},
+        'gap': gap,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=None, help='Path to the .json file with the schedule data, instead of generating one.')
+    add_arguments(parser)
+    parser.set_defaults(days=28)
+    parser.add_argument('-c', '--capacities', default=80.0, type=float,
+                        help='The percentage of capacities to fill as a minimum')
+    parser.add_argument('-t', '--timeout', default=60, type=int,
+                        help='The maximum time in seconds for the monolithic solve and for each window.')
+    parser.add_argument('--window', default=7, type=int, help='Number of days in a window.')
+    parser.add_argument('--step', default=None, type=int, help='Number of days committed from each window.')
+    parser.add_argument('--encoding', choices=ENCODINGS, default='pairwise',
+                        help='How to encode that no one can take conflicting shifts.')
+    args = parser.parse_args()
+
+    if args.file is None:
+        jsondata = generate_schedule(args.users, args.days, args.shifts_per_day, args.positions,
+            args.density, args.fulltimers, args.seed)
+    else:
+        with open(args.file, 'r') as f:
+            jsondata = json.load(f)
+    schedule = data.load_data(jsondata)
+    n = int(sum(s.capacity for s in schedule.shifts) * (args.capacities / 100))
+    r = compare(schedule, n, args.timeout, args.window, args.step, args.encoding)
+    for mode in ('monolithic', 'rolling'):
+        print(f'{mode:<12}{r[mode]["status"]:<12}objective {r[mode]["objective"]} in {round(r[mode]["time"], 2)} seconds')
+    if r['gap'] is not None:
+        print(f'Stitched objective is {round(r["gap"]*100, 2)}% from the monolithic one')
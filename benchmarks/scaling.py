@@ -0,0 +1,154 @@
+"""Run the whole pipeline on generated schedules of increasing size,
+and record the time and peak RSS of each phase:
+load -> forced availabilities -> build -> solve -> export
+
+Each size runs in a fresh process, so that the memory of one doesn't count in the next.
+The results are written as JSON, to compare them between commits.
+
+Usage:
+    python -m benchmarks.scaling results.json [--users 25 50 100 200] [-c 50] [-t 60] [-f]
+    python -m benchmarks.scaling new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from multiprocessing import Pool
+import data
+import excel
+from solver import ShiftSolver, ENCODINGS
+from benchmarks.generate import generate_schedule, add_arguments
+
+PHASES = ('load', 'forced', 'build', 'solve', 'export')
+
+def reset_peak_rss():
+    """Reset the peak resident set size of this process, where the OS supports it (Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes,
+    since the last reset_peak_rss where that's supported, else since it started.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024 # bytes on macOS, kilobytes elsewhere
+
+@contextmanager
+def phase(phases: dict, name: str):
+    """Record the wall time and the peak RSS of the block in phases[name]"""
+    reset_peak_rss()
+    begin = time.perf_counter()
+    yield
+    phases[name] = {'time': time.perf_counter() - begin, 'peak_rss': peak_rss()}
+
+def run_pipeline(jsondata: dict, capacities: float, timeout: int, force_available: bool, encoding: str) -> dict:
+    """Run the pipeline on the schedule data
+    Returns:
+        dict of the measurements of each phase and the size of the problem
+    """
+    phases = dict()
+    with phase(phases, 'load'):
+        schedule = data.load_data(json.loads(json.dumps(jsondata)))
+    with phase(phases, 'forced'):
+        if force_available:
+            schedule.add_forced_availabilities()
+    n = int(sum(s.capacity for s in schedule.shifts) * (capacities / 100))
+    solver = ShiftSolver(schedule)
+    with phase(phases, 'build'):
+        solver.BuildModel(n, encoding)
+    with phase(phases, 'solve'):
+        found = solver.SolveLevel(n, timeout=timeout)
+    with phase(phases, 'export'):
+        if found:
+            with tempfile.TemporaryDirectory() as folder:
+                with open(os.path.join(folder, f'{n}.json'), 'w', encoding='utf8') as jsonfile:
+                    json.dump(data.json_compatible_solve(solver.Values, jsondata), jsonfile, indent=4, ensure_ascii=False)
+                data.write_report(os.path.join(folder, 'solindex.txt'), [(f'{n}.json', solver)])
+                excel.write_to_file(os.path.join(folder, f'{n}.xlsx'), schedule, solver.Snapshot, constant_memory=True)
+    return {
+        'users': len(schedule.users),
+        'shifts': len(schedule.shifts),
+        'preferences': len(schedule.preferences),
+        'min_capacities_filled': n,
+        'constraints': solver.BuildStats.NConstraints,
+        'status': solver.StatusName(),
+        'objective': solver.ObjectiveValue() if found else None,
+        'phases': phases,
+    }
+
+def git_commit() -> str:
+    """The commit of the working tree, or None outside a git repository"""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(new: dict, old: dict):
+    """Print the ratio of the time and peak RSS of each phase, new to old, for the sizes in both"""
+    old_results = {r['users']: r for r in old['results']}
+    print(f'{"users":>6}  {"phase":<8}{"time":>10}{"peak RSS":>10}')
+    for r in new['results']:
+        if r['users'] not in old_results:
+            continue
+        for name in PHASES:
+            new_phase, old_phase = r['phases'][name], old_results[r['users']]['phases'][name]
+            time_ratio = new_phase['time'] / old_phase['time'] if old_phase['time'] > 0 else float('nan')
+            rss_ratio = new_phase['peak_rss'] / old_phase['peak_rss'] if old_phase['peak_rss'] > 0 else float('nan')
+            print(f'{r["users"]:>6}  {name:<8}{time_ratio:>9.2f}x{rss_ratio:>9.2f}x')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('file', help='Path to write the results .json file to.')
+    parser.add_argument('--users', nargs='+', default=[25, 50, 100, 200], type=int,
+                        help='The sizes to run, in number of users.')
+    add_arguments(parser, users=False)
+    parser.add_argument('-c', '--capacities', default=50.0, type=float,
+                        help='The percentage of capacities to fill as a minimum')
+    parser.add_argument('-t', '--timeout', default=60, type=int,
+                        help='The maximum time in seconds for each solve.')
+    parser.add_argument('-f', '--force-availabilities', dest='force_available', action='store_true',
+                        help='Extend shift availability for every position for each user.')
+    parser.add_argument('--encoding', choices=ENCODINGS, default='pairwise',
+                        help='How to encode that no one can take conflicting shifts.')
+    parser.add_argument('--compare', default=None,
+                        help='Path to the results .json file of an earlier run to compare with.')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"users":>6}{"shifts":>8}  ' + ''.join(f'{name:>9}' for name in PHASES) + '  status')
+    for users in args.users:
+        jsondata = generate_schedule(users, args.days, args.shifts_per_day, args.positions,
+            args.density, args.fulltimers, args.seed)
+        with Pool(1) as pool:
+            r = pool.apply(run_pipeline, (jsondata, args.capacities, args.timeout, args.force_available, args.encoding))
+        results.append(r)
+        print(f'{r["users"]:>6}{r["shifts"]:>8}  ' + ''.join(f'{r["phases"][name]["time"]:>9.2f}' for name in PHASES) + f'  {r["status"]}')
+
+    output = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {k: v for k, v in vars(args).items() if k not in ('file', 'compare')},
+        'results': results,
+    }
+    with open(args.file, 'w') as f:
+        json.dump(output, f, indent=4)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(output, json.load(f))
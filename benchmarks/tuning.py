@@ -0,0 +1,80 @@
+"""Search a grid of CP-SAT parameters for the fastest time to optimal on a corpus
+
+Every configuration of the grid solves every schedule of the corpus directory
+(see benchmarks.corpus). Configurations are ranked by the number of schedules
+not solved to optimality, then by the total time to optimal.
+
+Usage:
+    python -m benchmarks.tuning DIR [--grid grid.json] [-c 96] [-t 60] [-f] [--workers 8] [-o best.json]
+A grid file maps parameter names to the values to try, e.g.
+    {"linearization_level": [0, 1, 2], "cp_model_presolve": [true, false]}
+The best configuration written with -o can be passed to generate_assignments.py --params.
+"""
+import argparse
+import itertools
+import json
+from pathlib import Path
+from benchmarks.corpus import replay
+from solver import ENCODINGS
+
+DEFAULT_GRID = {
+    'linearization_level': [0, 1, 2],
+    'cp_model_presolve': [True, False],
+    'symmetry_level': [0, 2],
+}
+
+def configurations(grid: dict) -> "list[dict]":
+    """Every combination of the values of the grid"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def tune(paths: "list[Path]", grid: dict, capacities: float, timeout: int, force_available: bool = False,
+        seed: int = 0, workers: int = 8, encoding: str = 'pairwise') -> "list[dict]":
+    """Solve every schedule with every configuration of the grid
+    Returns:
+        [{'parameters', 'unsolved', 'time', 'results'}, ...] from the best configuration to the worst
+    """
+    ranking = []
+    for parameters in configurations(grid):
+        results = [replay(path, capacities, timeout, force_available, seed, workers, encoding, parameters) for path in paths]
+        ranking.append({
+            'parameters': parameters,
+            'unsolved': sum(r['status'] != 'OPTIMAL' for r in results),
+            'time': sum(r['solve_time'] for r in results),
+            'results': results,
+        })
+    ranking.sort(key=lambda c: (c['unsolved'], c['time']))
+    return ranking
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='The corpus directory with the captured .json files.')
+    parser.add_argument('--grid', default=None, help='Path to a .json file of parameter names and the values to try.')
+    parser.add_argument('-c', '--capacities', default=96.0, type=float,
+                        help='The percentage of capacities to fill as a minimum')
+    parser.add_argument('-t', '--timeout', default=60, type=int,
+                        help='The maximum time in seconds for each solve.')
+    parser.add_argument('-f', '--force-availabilities', dest='force_available', action='store_true',
+                        help='Extend shift availability for every position for each user.')
+    parser.add_argument('--seed', default=0, type=int, help='Random seed of CP-SAT.')
+    parser.add_argument('--workers', default=8, type=int, help='Number of CP-SAT search workers.')
+    parser.add_argument('--encoding', choices=ENCODINGS, default='pairwise',
+                        help='How to encode that no one can take conflicting shifts.')
+    parser.add_argument('-o', '--output', default=None, help='Path to write the best parameters as .json to.')
+    args = parser.parse_args()
+
+    grid = DEFAULT_GRID
+    if args.grid is not None:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    paths = sorted(Path(args.directory).glob('*.json'))
+    ranking = tune(paths, grid, args.capacities, args.timeout, args.force_available, args.seed, args.workers, args.encoding)
+
+    print(f'{"unsolved":>8}{"time (s)":>10}  parameters')
+    for c in ranking:
+        print(f'{c["unsolved"]:>8}{c["time"]:>10.2f}  {c["parameters"]}')
+    best = {'random_seed': args.seed, 'num_search_workers': args.workers, **ranking[0]['parameters']}
+    print(f'Best: {best}')
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(best, f, indent=4)
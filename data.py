@@ -1,6 +1,6 @@
 """Handling of raw data from files"""
 import json
-from solver import ShiftSolver
+from solver import LevelResult
 from typing import List, Dict, Tuple
 from requests.auth import HTTPBasicAuth
 from datetime import datetime
@@ -252,7 +252,18 @@ def override_preqs(filename, preqs):
     for person in override:
         preqs[person] = override[person]
 
-def write_report(filename: str, solutions: List[Tuple[str,ShiftSolver]]):
+def load_parameters(filename: str) -> dict:
+    """Load CP-SAT parameters for ShiftSolver.SetParameters from a .json file
+    Returns:
+        {'num_search_workers': 8, 'random_seed': 0, ...}
+    """
+    with open(filename, 'r', encoding='utf8') as jsonfile:
+        parameters = json.load(jsonfile)
+    if not isinstance(parameters, dict):
+        raise ValueError(f'{filename} should contain an object of parameter names and values')
+    return parameters
+
+def write_report(filename: str, solutions: List[Tuple[str,LevelResult]]):
     """Generate and write to file a report about the several solutions"""
     txt = ''
     for sol_file, sol in solutions:
@@ -263,4 +274,31 @@ Prefscore: {sol.PrefScore}
 -------
 """
     with open(filename, 'w', encoding='utf8') as txtfile:
-        txtfile.write(txt)
\ No newline at end of file
+        txtfile.write(txt)
+
+def _time_change(cold: float, warm: float) -> str:
+    """Format the change between a cold and a warm-started time"""
+    def fmt(t):
+        return 'not reached' if t is None else f'{round(t, 2)}s'
+    txt = f'{fmt(cold)} -> {fmt(warm)}'
+    if cold and warm is not None:
+        txt += f' ({round((warm-cold)/cold*100, 2)}%)'
+    return txt
+
+def write_warm_start_report(filename: str, steps: List[Tuple[int, float, float, float, float]]):
+    """Generate and write to file a report comparing cold and warm-started solves
+    Args:
+        steps: list of (min_capacities_filled, 
+                cold time to first solution, cold time to optimal,
+                warm time to first solution, warm time to optimal) tuples,
+                with None for a time that wasn't reached
+    """
+    txt = ''
+    for n, cold_first, cold_optimal, warm_first, warm_optimal in steps:
+        txt += f"""----- {n} -----
+Time to first solution: {_time_change(cold_first, warm_first)}
+Time to optimal: {_time_change(cold_optimal, warm_optimal)}
+-------
+"""
+    with open(filename, 'w', encoding='utf8') as txtfile:
+        txtfile.write(txt)
@@ -1,20 +1,12 @@
 import xlsxwriter
 from xlsxwriter.utility import xl_rowcol_to_cell as celln
-import data
 from colour import Color
-from typing import List, Tuple
-from solver import ShiftSolver
-
-def get_days(shifts):
-    """Get the list of day names, in order,
-    from a shift tuple list.
-    """
-    unique_days = []
-    for d, s in shifts.keys():
-        del s
-        if d not in unique_days:
-            unique_days.append(d)
-    return unique_days
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import numpy as np
+from models import Schedule
+from solver import LevelResult, SolutionSnapshot
 
 def get_prefcolor(n, max_n):
     """Takes a pref score, and a worst pref score,
@@ -26,59 +18,68 @@ def get_prefcolor(n, max_n):
         color: long hex color
     """
     assert n <= max_n
+    return get_gradient(max_n)[n]
+
+@lru_cache(maxsize=None)
+def get_gradient(max_n) -> Tuple[str, ...]:
+    """The colors of the pref scores from 0 to max_n, as long hex colors"""
     good = Color('#bef7c5')
     bad = Color('#ffd9d9')
-    return list(good.range_to(bad, max_n + 1))[n].hex_l
+    return tuple(c.hex_l for c in good.range_to(bad, max_n + 1))
 
-def get_people(preferences):
-    return sorted(list(set([p for d,s,p in preferences.keys()])))
+def get_time_of_day(t: datetime) -> float:
+    """The time of day as a fraction of the day, for a time format"""
+    return (t.hour*60 + t.minute) / (24*60)
 
-def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
-    """Write the solver result to an Excel workbook
+def write_to_file(filename: str, schedule: Schedule, snapshot: Optional[SolutionSnapshot] = None,
+        constant_memory: bool = False, live_formulas: bool = False):
+    """Write a solution of the schedule to an Excel workbook.
+    The rows are streamed from the schedule and the arrays of the snapshot,
+    with one column for each user, in the order of schedule.users.
     Args:
-        shifts: dict of sdata[day_id, shift_id] = {
-            'capacity': 2,
-            'begin': 525,
-            'end': 960
-            }
-        prefs: dict of preferences[day_id,shift_id,person_id] = pref_score 
-        assignments: dict of assigned[day_id,shift_id,person_id] = True | False
-        personal_reqs: dict of preqs[person_id] = {
-            'min': n1, 
-            'max': n2, 
-            'min_long_shifts': n3, 
-            'only_long_shifts': bool1
-            }
+        filename: to create the workbook at
+        schedule: the Schedule solved
+        snapshot: the SolutionSnapshot of the solution, or None to write the schedule with no one assigned
+        constant_memory: flush each row to disk once the next one is started,
+            to keep the memory used bounded on large workbooks
+        live_formulas: list every shift and person in the sensei-view and padawan-view sheets,
+            looking up whether they work in the assignments sheet, instead of
+            listing only the shifts people work
     """
-    workbook = xlsxwriter.Workbook(filename)
+    if snapshot is None:
+        snapshot = SolutionSnapshot(schedule, dict.fromkeys(schedule.preference, 0))
+    shifts = schedule.shifts
+    people = [u.id for u in schedule.users]
+    n_shifts = len(shifts)
+    n_people = len(people)
+    # (user row, pref score, assigned) of the preferences of each shift, in the order of the users
+    order = np.lexsort((snapshot.user_rows, snapshot.shift_rows))
+    prefs_of_shift = [[] for _ in shifts]
+    for shift_row, user_row, pref, assigned in zip(snapshot.shift_rows[order].tolist(), snapshot.user_rows[order].tolist(),
+            snapshot.priority[order].tolist(), snapshot.assigned[order].tolist()):
+        prefs_of_shift[shift_row].append((user_row, pref, assigned))
+
+    # Every sheet is written in row order, as constant_memory requires
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': constant_memory})
     shifts_ws = workbook.add_worksheet(name="shifts")
     time_f = workbook.add_format({'num_format': 'hh:mm'})
     
     # Shifts
-    n_shifts = len(shifts)
     ## Headers
     for idx, txt in enumerate(["Day", "ShiftID", "Capacity", "Begin", "End", "strID", "length in hours"]):
         shifts_ws.write(0, idx, txt)
 
-    for rowidx, ((d,s), sdata) in enumerate(shifts.items(), start=1):
-        shifts_ws.write(rowidx, 0, d) # Day
-        shifts_ws.write(rowidx, 1, s) # ShiftId
-        shifts_ws.write(rowidx, 2, sdata['capacity']) # Capacity
-        shifts_ws.write(rowidx, 3, sdata['begin']/(24*60), time_f) # Begin time
-        shifts_ws.write(rowidx, 4, sdata['end']/(24*60), time_f) # End time
-        shifts_ws.write(rowidx, 5, str(d)+str(s)) # strID - should be unique
-        shifts_ws.write_formula(rowidx, 6, f'=({celln(rowidx, 4, col_abs=True)}-{celln(rowidx, 3, col_abs=True)})*24') # shift length
+    for rowidx, shift in enumerate(shifts, start=1):
+        shifts_ws.write(rowidx, 0, shift.begin.date().isoformat()) # Day
+        shifts_ws.write(rowidx, 1, shift.id) # ShiftId
+        shifts_ws.write(rowidx, 2, shift.capacity) # Capacity
+        shifts_ws.write(rowidx, 3, get_time_of_day(shift.begin), time_f) # Begin time
+        shifts_ws.write(rowidx, 4, get_time_of_day(shift.end), time_f) # End time
+        shifts_ws.write(rowidx, 5, str(shift.id)) # strID - should be unique
+        shifts_ws.write_number(rowidx, 6, shift.length.total_seconds() / (60*60)) # shift length, also past midnight
 
     # Preferences
-    people = get_people(preferences)
-    n_people = len(people)
     percentage_format = workbook.add_format({'num_format': '0.00%'})
-    
-    # Add default none values to preferences dict
-    for d,s in shifts.keys():
-        for p in people:
-            if (d,s,p) not in preferences.keys():
-                preferences[d,s,p] = None
 
     # Write to the sheet
     pref_ws = workbook.add_worksheet(name="preferences")
@@ -86,10 +87,10 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
     ## Headers
     for idx, txt in enumerate(["strID"] + people):
         pref_ws.write(0, idx, txt)
-    for rowidx, (d,s) in enumerate(shifts.keys(), start=1):
-        pref_ws.write(rowidx, 0, str(d)+str(s)) # strID
-        for colidx, p in enumerate(people, start=1):
-            pref_ws.write(rowidx, colidx, preferences[d,s,p])
+    for rowidx, shift in enumerate(shifts, start=1):
+        pref_ws.write(rowidx, 0, str(shift.id)) # strID
+        for user_row, pref, _ in prefs_of_shift[rowidx-1]:
+            pref_ws.write(rowidx, user_row+1, pref)
     
     ## % of shifts registered to last row
     pref_ws.write(n_shifts+1,0, "Registered%")
@@ -112,17 +113,25 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
     ## Headers
     for idx, txt in enumerate(["person","Min. hours", "Max. hours","Min. long shits","Only long shifts"]):
         pers_ws.write(0, idx, txt)
-    for rowidx, p in enumerate(people, start=1):
-        pers_ws.write(rowidx, 0, p)
-        pers_ws.write_number(rowidx, 1, personal_reqs[p]['min'])
-        pers_ws.write_number(rowidx, 2, personal_reqs[p]['max'])
-        pers_ws.write_number(rowidx, 3, personal_reqs[p]['min_long_shifts'])
-        pers_ws.write_boolean(rowidx, 4, personal_reqs[p]['only_long_shifts'])
+    for rowidx, user in enumerate(schedule.users, start=1):
+        pers_ws.write(rowidx, 0, user.id)
+        pers_ws.write_number(rowidx, 1, user.min_hours)
+        pers_ws.write_number(rowidx, 2, user.max_hours)
+        pers_ws.write_number(rowidx, 3, user.min_long)
+        pers_ws.write_boolean(rowidx, 4, user.only_long)
 
     # Assignments
 
     # Formats
-    no_pref = workbook.add_format({'font_color':'#dedede'})
+    pref_formats = dict() # pref_formats[color] = format
+    cap_format = workbook.add_format({'left':1})
+    ## The number of people assigned to a shift is
+    ##      green,  when the shift is full
+    ok_format =      workbook.add_format({'bg_color':'#a6ff9e'})
+    ##      orange, when the shift is below capacity
+    medium_format = workbook.add_format({'bg_color': '#ffc670'})
+    ##      red,    when the shift is over capacity
+    bad_format =  workbook.add_format({'bg_color': '#ff7a70'})
 
     assign_ws = workbook.add_worksheet(name="assignments")
     # Write to the sheet
@@ -130,39 +139,22 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
     for idx, txt in enumerate(["strID"] + people + ["n assigned", "capacity", "Is long"]):
         assign_ws.write(0, idx, txt)
 
-    for rowidx, (d,s) in enumerate(shifts.keys(), start=1):
-        assign_ws.write(rowidx, 0, str(d)+str(s)) # strID
-        for colidx, p in enumerate(people, start=1):
-            if preferences[d,s,p] is None:
-                assign_ws.write_boolean(rowidx, colidx, assignments[d,s,p], no_pref)
-            else:
-                pref_color = get_prefcolor(preferences[d,s,p], max([preferences[d,s,p] for p in people if preferences[d,s,p] is not None]))
-                pref_format = workbook.add_format({'bg_color':pref_color})
-                assign_ws.write_boolean(rowidx, colidx, assignments[d,s,p], pref_format)
-    # Add formula t calculate number of empty shifts
-    assign_ws.write(n_shifts+1,n_people+1, 'Empty shifts')
-    assign_ws.write_formula(n_shifts+1,n_people+2, f'=COUNTIF({celln(1,n_people+1)}:{celln(n_shifts,n_people+1)},0)')
-    # Add formula to calculate number of empty places in shifts
-    assign_ws.write(n_shifts+2,n_people+1, 'Empty places on shifts')
-    assign_ws.write_formula(n_shifts+2,n_people+2, f'=SUM({celln(1,n_people+2)}:{celln(n_shifts,n_people+2)})-SUM({celln(1,n_people+1)}:{celln(n_shifts,n_people+1)})')
-    # Add total pref score
-    assign_ws.write(n_shifts+3,n_people+1, 'Pref score')
-    assign_ws.write(n_shifts+3,n_people+2,f'=SUM({celln(n_shifts+7,1)}:{celln(n_shifts+7,n_people)})')
-
-    # Add shift capacity condition indicator
-    ## Add a formula to the end of each row,
-    ## to calculate the number of people assigned.
-    ## Add conditional formatting to this cell,
-    ## so that it's:
-    ##      green,  when the shift is full
-    ok_format =      workbook.add_format({'bg_color':'#a6ff9e'})
-    ##      orange, when the shift is below capacity
-    medium_format = workbook.add_format({'bg_color': '#ffc670'})
-    ##      red,    when the shift is over capacity
-    bad_format =  workbook.add_format({'bg_color': '#ff7a70'})
-    for rowidx, (d,s) in enumerate(shifts.keys(), start=1):
+    for rowidx, shift in enumerate(shifts, start=1):
+        assign_ws.write(rowidx, 0, str(shift.id)) # strID
+        # Only the people with a preference for the shift can be assigned to it
+        prefs = prefs_of_shift[rowidx-1]
+        max_pref = max((pref for _, pref, _ in prefs), default=0)
+        for user_row, pref, assigned in prefs:
+            pref_color = get_prefcolor(pref, max_pref)
+            if pref_color not in pref_formats:
+                pref_formats[pref_color] = workbook.add_format({'bg_color':pref_color})
+            assign_ws.write_boolean(rowidx, user_row+1, assigned, pref_formats[pref_color])
+
+        # Add shift capacity condition indicator
+        ## Add a formula to the end of each row,
+        ## to calculate the number of people assigned.
+        ## Add conditional formatting to this cell, with the colors above
         # Current shift state
-        cap_format = workbook.add_format({'left':1})
         assign_ws.write_formula(
             rowidx, n_people+1, 
             f'=COUNTIF({celln(rowidx, 1)}:{celln(rowidx,n_people)}, TRUE)',
@@ -171,10 +163,7 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
         assign_ws.write_formula(
             rowidx, n_people+2,
             f'=shifts!C{rowidx+1}')
-        assign_ws.write_formula(
-            rowidx, n_people+3,
-            f'=IF(INDEX(shifts!{celln(1,0)}:{celln(n_shifts,6)},MATCH(assignments!{celln(rowidx,0)},assignments!{celln(1,0)}:{celln(n_shifts,0)},0),7)>5,"Long", "")'
-        )
+        assign_ws.write(rowidx, n_people+3, "Long" if shift.is_long else "")
 
         #region Conditional formatting the n_people on shift
         capacity_col_row = celln(rowidx, n_people+2)
@@ -227,32 +216,31 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
 
     # TODO minor formatting here
 
-    # Row headers
-    for row_idx, txt in enumerate(["Min. hours", 
-                         "Actual hours", 
-                         "Max. hours", 
-                         "Long shifts taken", 
-                         "Min. long shifts", 
-                         "Long shifts only",
-                         "Pref score"
+    # Rows after the last shift: a header, the formula of each person,
+    # and the totals of the schedule on the first three
+    r0 = n_shifts+1
+    totals = [
+        ('Empty shifts', f'=COUNTIF({celln(1,n_people+1)}:{celln(n_shifts,n_people+1)},0)'),
+        ('Empty places on shifts', f'=SUM({celln(1,n_people+2)}:{celln(n_shifts,n_people+2)})-SUM({celln(1,n_people+1)}:{celln(n_shifts,n_people+1)})'),
+        ('Pref score', f'=SUM({celln(r0+6,1)}:{celln(r0+6,n_people)})'),
+    ]
+    for row_idx, (txt, formula) in enumerate([
+                        ("Min. hours", lambda col_idx: preq_formula(col_idx, 2)),
+                        ("Actual hours", workhours_formula),
+                        ("Max. hours", lambda col_idx: preq_formula(col_idx, 3)),
+                        ("Long shifts taken", lambda col_idx: f'=COUNTIFS({celln(1,col_idx)}:{celln(n_shifts,col_idx)},TRUE,{celln(1, n_people+3)}:{celln(n_shifts, n_people+3)},"Long")'),
+                        ("Min. long shifts", lambda col_idx: preq_formula(col_idx, 4)),
+                        ("Long shifts only", lambda col_idx: preq_formula(col_idx, 5)),
+                        ("Pref score", pref_score_formula),
                             ]):
-        r0 = n_shifts+1
         assign_ws.write(r0+row_idx, 0, txt)
+        for col_idx in range(1, n_people+1):
+            assign_ws.write_formula(r0+row_idx, col_idx, formula(col_idx))
+        if row_idx < len(totals):
+            assign_ws.write(r0+row_idx, n_people+1, totals[row_idx][0])
+            assign_ws.write_formula(r0+row_idx, n_people+2, totals[row_idx][1])
 
-    for col_idx, p in enumerate(people, start=1):
-        r0 = n_shifts+1 # Start after the last shift
-        min_hours_formula = preq_formula(col_idx, 2)
-        assign_ws.write_formula(r0, col_idx, min_hours_formula)
-        assign_ws.write_formula(r0+1, col_idx, workhours_formula(col_idx))
-        max_hours_formula = preq_formula(col_idx, 3)
-        assign_ws.write_formula(r0+2, col_idx, max_hours_formula)
-        assign_ws.write_formula(r0+3, col_idx, f'=COUNTIFS({celln(1,col_idx)}:{celln(n_shifts,col_idx)},TRUE,{celln(1, n_people+3)}:{celln(n_shifts, n_people+3)},"Long")')
-        min_long_shifts_formula = preq_formula(col_idx, 4)
-        assign_ws.write_formula(r0+4, col_idx, min_long_shifts_formula)
-        long_shifts_only_formula = preq_formula(col_idx, 5)
-        assign_ws.write_formula(r0+5, col_idx, long_shifts_only_formula)
-        assign_ws.write_formula(r0+6, col_idx, pref_score_formula(col_idx))
-
+    for col_idx in range(1, n_people+1):
         # Add conditional to show if hours is withing range
         assign_ws.conditional_format(celln(r0+1,col_idx),
         {
@@ -286,6 +274,28 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
         }
     )
 
+    # Rows of the views, as (shift row, user row)
+    if live_formulas:
+        by_shift = ((s,u) for s in range(n_shifts) for u in range(n_people))
+        by_person = ((s,u) for u in range(n_people) for s in range(n_shifts))
+    else:
+        # Only who works, in the order of the shifts and of the people
+        shifts_of = [[] for _ in people]
+        for s, prefs in enumerate(prefs_of_shift):
+            for u, _, assigned in prefs:
+                if assigned:
+                    shifts_of[u].append(s)
+        by_shift = ((s,u) for s, prefs in enumerate(prefs_of_shift) for u, _, assigned in prefs if assigned)
+        by_person = ((s,u) for u, ss in enumerate(shifts_of) for s in ss)
+    assignments_range = f'assignments!{celln(1,1)}:{celln(n_shifts, n_people)}'
+    shiftids_range = f'assignments!{celln(1,0)}:{celln(n_shifts,0)}'
+    names_range = f'assignments!{celln(0,1)}:{celln(0, n_people)}'
+    def write_works(ws, r_index, shift_col, person_col):
+        if live_formulas:
+            ws.write_formula(r_index, 4, f'=INDEX({assignments_range},MATCH({celln(r_index, shift_col)},{shiftids_range},0),MATCH({celln(r_index, person_col)},{names_range},0))')
+        else:
+            ws.write_boolean(r_index, 4, True)
+
     # Master view
     master = workbook.add_worksheet(name='sensei-view')
     for col_idx, txt in enumerate(["strID", 
@@ -296,22 +306,16 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
                             ]):
         master.write(0, col_idx, txt) # TODO hide works columns
     
-    for scount, ((d,s), sdata) in enumerate(shifts.items()):
-        for pcount, person in enumerate(people):
-            r_index = scount*n_people+pcount + 1
-            master.write(r_index, 0, str(d)+str(s))
-            master.write(r_index, 1, sdata['begin']/(24*60), time_f)
-            master.write(r_index, 2, sdata['end']/(24*60), time_f)
-            master.write(r_index, 3, person)
-            assignments_range = f'assignments!{celln(1,1)}:{celln(n_shifts, n_people)}'
-            shiftname_addr = f'{celln(r_index, 0)}'
-            shiftids_range = f'assignments!{celln(1,0)}:{celln(n_shifts,0)}'
-            pname_addr = f'{celln(r_index, 3)}'
-            names_range = f'assignments!{celln(0,1)}:{celln(0, n_people)}'
-            master.write_formula(r_index, 4, f'=INDEX({assignments_range},MATCH({shiftname_addr},{shiftids_range},0),MATCH({pname_addr},{names_range},0))')
+    for r_index, (s,u) in enumerate(by_shift, start=1):
+        master.write(r_index, 0, str(shifts[s].id))
+        master.write(r_index, 1, get_time_of_day(shifts[s].begin), time_f)
+        master.write(r_index, 2, get_time_of_day(shifts[s].end), time_f)
+        master.write(r_index, 3, people[u])
+        write_works(master, r_index, 0, 3)
 
     master.autofilter(0,4,0,4)
-    master.filter_column(4, "Works == TRUE")
+    if live_formulas:
+        master.filter_column(4, "Works == TRUE")
 
     # Worker view
     worker = workbook.add_worksheet(name='padawan-view')
@@ -323,32 +327,26 @@ def write_to_file(filename, shifts, preferences, assignments, personal_reqs):
                         "Works"
                             ]):
         worker.write(0, col_idx, txt) # TODO hide works columns
-    for pcount, person in enumerate(people):
-        for scount, ((d,s), sdata) in enumerate(shifts.items()):
-            r_index = pcount*n_shifts+scount + 1
-            worker.write(r_index, 0, person)
-            worker.write(r_index, 1, str(d)+str(s))
-            worker.write(r_index, 2, sdata['begin']/(24*60), time_f)
-            worker.write(r_index, 3, sdata['end']/(24*60), time_f)
-            assignments_range = f'assignments!{celln(1,1)}:{celln(n_shifts, n_people)}'
-            shiftname_addr = f'{celln(r_index, 1)}'
-            shiftids_range = f'assignments!{celln(1,0)}:{celln(n_shifts,0)}'
-            pname_addr = f'{celln(r_index, 0)}'
-            names_range = f'assignments!{celln(0,1)}:{celln(0, n_people)}'
-            worker.write_formula(r_index, 4, f'=INDEX({assignments_range},MATCH({shiftname_addr},{shiftids_range},0),MATCH({pname_addr},{names_range},0))')
+    for r_index, (s,u) in enumerate(by_person, start=1):
+        worker.write(r_index, 0, people[u])
+        worker.write(r_index, 1, str(shifts[s].id))
+        worker.write(r_index, 2, get_time_of_day(shifts[s].begin), time_f)
+        worker.write(r_index, 3, get_time_of_day(shifts[s].end), time_f)
+        write_works(worker, r_index, 1, 0)
 
     worker.autofilter(0,0,0,4) # For the your name
-    worker.filter_column(4, "Works == TRUE")
+    if live_formulas:
+        worker.filter_column(4, "Works == TRUE")
 
 
     workbook.close()
 
-def write_summary(filename: str, rows: Tuple[str, ShiftSolver]):
+def write_summary(filename: str, rows: List[Tuple[str, LevelResult]]):
     """Creates an excel worksheet to a new file showing the properties of the solves,
     with links to them.
     Args:
         filename: to create the workbook at
-        rows: list of (xlsxfilepath, solver) tuples
+        rows: list of (xlsxfilepath, LevelResult) tuples
     """
     workbook = xlsxwriter.Workbook(filename)
     
@@ -373,13 +371,13 @@ def write_summary(filename: str, rows: Tuple[str, ShiftSolver]):
     is_first_row = True
     for rowidx, (solutionpath, solver) in enumerate(rows, start=1):
         for colidx, (val, format_) in enumerate(
-            [(solver.PrefScore(),None),
+            [(solver.PrefScore,None),
             (f'={(c_pref := celln(rowidx,0))}/{(c_n_all_people := celln(4,11))}', dec_format),
-            (",".join(list(map(str,solver.PrefModes()))), None),
-            (solver.EmptyShifts(), None),
-            (solver.UnfilledHours(), hour_format),
+            (",".join(list(map(str,solver.PrefModes))), None),
+            (solver.EmptyShifts, None),
+            (solver.UnfilledHours, hour_format),
             (f'={(c_hours := celln(rowidx, 4))}/{(c_n_all_hours := celln(3,11))}', percentage_format),
-            (solver.UnfilledCapacities(), None),
+            (solver.UnfilledCapacities, None),
             (f'={(c_caps := celln(rowidx, 6))}/{(c_n_all_caps := celln(2,11))}', percentage_format),
             (f'=IF(ISNUMBER({(c_caps_prev := celln(rowidx-1, 6))}),IF(AND((({c_caps_prev}-{c_caps})<>0),(({(c_pref_prev := celln(rowidx-1,0))}-{c_pref})<>0)),(-({c_pref}-{c_pref_prev})/({c_caps}-{c_caps_prev})),0),"")', None)
             ]
@@ -397,13 +395,13 @@ def write_summary(filename: str, rows: Tuple[str, ShiftSolver]):
         # Use the first solution, these values should be equal everywhere
         solver = rows[0][1]
         ws.write(1, 10, "Number of shifts")
-        ws.write_number(1,11, solver.NShifts())
+        ws.write_number(1,11, solver.NShifts)
         ws.write(2, 10, "Number of capacities")
-        ws.write_number(c_n_all_caps, solver.NCapacities())
+        ws.write_number(c_n_all_caps, solver.NCapacities)
         ws.write(3, 10, "Number of hours")
-        ws.write_number(c_n_all_hours, solver.Hours())
+        ws.write_number(c_n_all_hours, solver.Hours)
         ws.write(4, 10, "Number of people")
-        ws.write_number(c_n_all_people, solver.NPeople())
+        ws.write_number(c_n_all_people, solver.NPeople)
     except IndexError:
         # No solutions
         pass
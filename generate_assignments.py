@@ -1,10 +1,14 @@
 import argparse
 import data
 import json
-from solver import ShiftSolver
+import parallel
+import rolling
+from solver import ShiftSolver, LevelResult, ENCODINGS
 import excel
 from pathlib import Path
-from copy import deepcopy
+from anonymize import capture
+from model_cache import ModelCache
+from solution_store import SolutionStore
 
 parser = argparse.ArgumentParser()
 parser.add_argument('file', 
@@ -21,45 +25,210 @@ parser.add_argument('-c', '--capacities',
 
 parser.add_argument('-f', '--force-availabilities', dest='force_available', 
                         help='Extend shift availability for every position for each user.', action='store_true')
-args = parser.parse_args()
+parser.add_argument('--no-warm-start', dest='warm_start',
+                        help="Don't use the solution of the previous capacity level as a hint.", action='store_false')
 
-with open(args.file, 'r') as f:
-    jsondata = json.load(f)
-    schedule = data.load_data(jsondata)
+parser.add_argument('--warm-start-report', dest='warm_start_report',
+                        help='Also solve each level without hints, and compare the solve times in sols/warmstart.txt.', action='store_true')
 
-if args.force_available: # Optionally extend solution space
-    schedule.add_forced_availabilities()
+parser.add_argument('--search', choices=['linear', 'bisect'], default='linear',
+                        help='linear: solve every capacity level up from the starting one, until the first infeasible one. '
+                        'bisect: binary search for the highest feasible level first, then solve the levels up to it.')
 
-solver = ShiftSolver(schedule)
+parser.add_argument('--top', type=int, default=None,
+                        help='With --search bisect, only solve the k highest feasible levels.')
 
-sum_capacities = 0
-# Calculate the number of capacities total
-for shift in schedule.shifts:
-    sum_capacities += shift.capacity
+parser.add_argument('--every', type=int, default=None,
+                        help='With --search bisect, only solve every m-th level, counting down from the highest feasible one. 1 by default.')
 
-starting_capacity = int(sum_capacities*(args.capacities / 100))
+parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes to solve the capacity levels in. '
+                        'The cores are split between them and the CP-SAT search workers.')
 
-subfolderpath = '.'
+parser.add_argument('--encoding', choices=ENCODINGS, default='pairwise',
+                        help='How to encode that no one can take conflicting shifts: '
+                        'pairwise constraints, one constraint for each group of shifts that all conflict (clique), '
+                        'or one NoOverlap constraint for each user, of their shifts extended by the rest period (nooverlap).')
 
-Path(subfolderpath+'/sols').mkdir(parents=True, exist_ok=True)
-rows = [] # {'pref':s1, 'unfilled':s2, 'empty':s3, 'filename':s4}
+parser.add_argument('--stats', dest='stats',
+                        help='Write the model build stats and the CP-SAT solve stats of each level to sols/{level}.stats.json.', action='store_true')
 
-if not args.nosolve:
-    for n in range(starting_capacity, sum_capacities+1):
-        if solver.Solve(
+parser.add_argument('--trace-memory', dest='trace_memory',
+                        help='With --stats, also record the peak Python heap of building each constraint family, '
+                        'which leaves out the memory of the model proto. Slows down building the model.', action='store_true')
+
+parser.add_argument('--capture', metavar='DIR', default=None,
+                        help='Write an anonymized copy of the input to the corpus directory DIR, to replay with benchmarks.corpus.')
+
+parser.add_argument('--params', default=None,
+                        help='Path to a .json file of CP-SAT parameters, e.g. {"num_search_workers": 8, "random_seed": 0}.')
+
+parser.add_argument('--model-cache', dest='model_cache', metavar='DIR', default=None,
+                        help='Load the built model from the cache directory DIR if this schedule was built before, else store it there.')
+
+parser.add_argument('--solution-store', dest='solution_store', metavar='DIR', default=None,
+                        help='Keep the best solution of each level in DIR. Levels solved to optimality before are answered from it, '
+                        'the ones only solved to feasibility are hinted with it.')
+
+parser.add_argument('--window', type=int, default=None,
+                        help='Solve each level in overlapping windows of this many days, '
+                        'fixing the assignments of the earlier windows. For schedules too long to solve at once.')
+
+parser.add_argument('--step', type=int, default=None,
+                        help='With --window, the number of days committed from each window, half of it by default.')
+
+parser.add_argument('--stream', action='store_true',
+                        help='Print each improving solution of a level as it is found, and write it to sols/{level}.json right away.')
+
+parser.add_argument('--excel', action='store_true',
+                        help='Also write each solution to sols/{level}.xlsx, and a summary of the levels to sols/summary.xlsx.')
+
+parser.add_argument('--live-formulas', dest='live_formulas', action='store_true',
+                        help='In the sensei-view and padawan-view sheets, list every shift and person with a lookup formula, '
+                        'instead of only the shifts people work. Much slower to open on large schedules.')
+
+parser.add_argument('--stop-gap', dest='stop_gap', type=float, default=None,
+                        help='Stop the search of a level when its solution is within this percentage of the best bound.')
+
+def stream_solutions(folder: str, jsondata: dict, print_progress: bool, stop_gap: float = None):
+    """Create the on_solution callback of ShiftSolver for the flags
+    Args:
+        folder: write each solution there as {level}.json, or don't if None
+        jsondata: the schedule data, for json_compatible_solve
+        print_progress: print the objective, bound and time of each solution
+        stop_gap: stop the search within this percentage of the bound
+    """
+    def on_solution(solution):
+        if print_progress:
+            print(f'  {solution.min_capacities_filled}: objective {solution.objective}, bound {solution.bound} at {round(solution.wall_time, 2)} seconds')
+        if folder is not None:
+            with open(f'{folder}/{solution.min_capacities_filled}.json', 'w', encoding='utf8') as jsonfile:
+                json.dump(data.json_compatible_solve(solution.values, jsondata), jsonfile, indent=4, ensure_ascii=False)
+        if stop_gap is not None:
+            return abs(solution.objective - solution.bound) <= abs(solution.objective) * stop_gap / 100
+    return on_solution
+
+def main():
+    args = parser.parse_args()
+    if args.jobs > 1 and args.warm_start_report:
+        parser.error('--warm-start-report is only supported with a single job')
+    if (args.stream or args.stop_gap is not None) and (args.jobs > 1 or args.window is not None):
+        parser.error('--stream and --stop-gap are only supported with a single job and without --window')
+    if args.window is not None and (args.jobs > 1 or args.search == 'bisect' or args.warm_start_report):
+        parser.error('--window is only supported with a single job, linear search and no warm start report')
+    if (args.top is not None or args.every is not None) and args.search != 'bisect':
+        parser.error('--top and --every are only supported with --search bisect')
+    if args.top is not None and args.top < 1:
+        parser.error('--top should be at least 1')
+    if args.every is not None and args.every < 1:
+        parser.error('--every should be at least 1')
+
+    with open(args.file, 'r') as f:
+        jsondata = json.load(f)
+        schedule = data.load_data(jsondata)
+
+    if args.capture is not None:
+        print(f'Captured as {capture(jsondata, args.capture)}')
+
+    if args.force_available: # Optionally extend solution space
+        schedule.add_forced_availabilities()
+
+    parameters = None if args.params is None else data.load_parameters(args.params)
+    model_cache = None if args.model_cache is None else ModelCache(args.model_cache)
+    solution_store = None if args.solution_store is None else SolutionStore(args.solution_store)
+    solver = ShiftSolver(schedule, trace_memory=args.trace_memory, parameters=parameters,
+        model_cache=model_cache, solution_store=solution_store)
+
+    sum_capacities = 0
+    # Calculate the number of capacities total
+    for shift in schedule.shifts:
+        sum_capacities += shift.capacity
+
+    starting_capacity = int(sum_capacities*(args.capacities / 100))
+
+    subfolderpath = '.'
+
+    Path(subfolderpath+'/sols').mkdir(parents=True, exist_ok=True)
+    rows = [] # {'pref':s1, 'unfilled':s2, 'empty':s3, 'filename':s4}
+    warm_start_steps = [] # (n, cold first, cold optimal, warm first, warm optimal)
+
+    if args.nosolve:
+        excel.write_to_file(f'{subfolderpath}/sols/overview.xlsx', schedule,
+            constant_memory=True, live_formulas=args.live_formulas)
+    else:
+        if args.search == 'bisect':
+            max_capacity = solver.MaxFeasibleCapacity(starting_capacity, sum_capacities, timeout=args.timeout, encoding=args.encoding)
+            if max_capacity is None:
+                levels = []
+            else:
+                levels = list(range(max_capacity, starting_capacity-1, -(args.every or 1)))[:args.top][::-1]
+                print(f'Highest feasible capacity: {max_capacity}, solving levels {levels}')
+        else:
+            levels = range(starting_capacity, sum_capacities+1)
+        if args.window is not None:
+            results = ((n, r.found, r) for n, r in ((n, rolling.solve_rolling(
+                schedule, n, args.window, args.step,
+                timeout=args.timeout,
+                encoding=args.encoding,
+                parameters=parameters)) for n in levels))
+        elif args.jobs > 1:
+            results = ((r.min_capacities_filled, r.found, r) for r in parallel.solve_levels(
+                jsondata, levels, args.jobs,
                 timeout=args.timeout,
-                min_capacities_filled=n):       
-            print(f'Prefscore: {solver.ObjectiveValue()} Unfilled capacities: {solver.UnfilledCapacities} in {round(solver.WallTime(),2)} seconds', end='')
-            if solver.StatusName() != 'OPTIMAL':
-                print(' !SUBOPTIMAL SOLVE! Try to run with more time', end='')
-            print()
-            filename = f'{n}.json'
-            # Write to excel and add index for the root later
-            rows.append((filename, deepcopy(solver)))
-
-            with open(f'{subfolderpath}/sols/{n}.json', 'w', encoding='utf8') as jsonfile:
-                json.dump(data.json_compatible_solve(solver.Values, jsondata), jsonfile, indent=4, ensure_ascii=False)
-        else: # No more solutions to be found
-            break
-    if len(rows) > 0:
-        data.write_report(f'{subfolderpath}/sols/solindex.txt', rows)
+                force_available=args.force_available,
+                warm_start=args.warm_start,
+                encoding=args.encoding,
+                trace_memory=args.trace_memory,
+                parameters=parameters,
+                model_cache=model_cache,
+                solution_store=solution_store))
+        else:
+            on_solution = None
+            if args.stream or args.stop_gap is not None:
+                on_solution = stream_solutions(f'{subfolderpath}/sols' if args.stream else None, jsondata, args.stream, args.stop_gap)
+            results = ((n, found, LevelResult(solver, n)) for n, found in solver.SolveSweep(
+                levels,
+                timeout=args.timeout,
+                warm_start=args.warm_start,
+                encoding=args.encoding,
+                on_solution=on_solution,
+                reuse_model=args.search == 'bisect'))
+        for n, found, result in results:
+            if args.stats: # Also for the level that was infeasible or timed out
+                with open(f'{subfolderpath}/sols/{n}.stats.json', 'w', encoding='utf8') as statsfile:
+                    json.dump(result.Stats, statsfile, indent=4)
+            if found:
+                print(f'Prefscore: {result.PrefScore} Unfilled capacities: {result.UnfilledCapacities} in {round(result.WallTime(),2)} seconds', end='')
+                if result.StatusName() != 'OPTIMAL' and args.window is None:
+                    print(' !SUBOPTIMAL SOLVE! Try to run with more time', end='')
+                print()
+                if args.warm_start_report:
+                    cold_solver = ShiftSolver(schedule, parameters=parameters, model_cache=model_cache)
+                    cold_solver.Solve(timeout=args.timeout, min_capacities_filled=n, encoding=args.encoding)
+                    warm_start_steps.append((n,
+                        cold_solver.FirstSolutionTime,
+                        cold_solver.WallTime() if cold_solver.StatusName() == 'OPTIMAL' else None,
+                        result.FirstSolutionTime,
+                        result.WallTime() if result.StatusName() == 'OPTIMAL' else None))
+                filename = f'{n}.json'
+                # Write to excel and add index for the root later
+                rows.append((filename, result))
+
+                with open(f'{subfolderpath}/sols/{n}.json', 'w', encoding='utf8') as jsonfile:
+                    json.dump(data.json_compatible_solve(result.Values, jsondata), jsonfile, indent=4, ensure_ascii=False)
+                if args.excel:
+                    excel.write_to_file(f'{subfolderpath}/sols/{n}.xlsx', schedule, result.Snapshot,
+                        constant_memory=True, live_formulas=args.live_formulas)
+            else: # No more solutions to be found
+                break
+        results.close()
+        if len(rows) > 0:
+            data.write_report(f'{subfolderpath}/sols/solindex.txt', rows)
+            if args.excel:
+                excel.write_summary(f'{subfolderpath}/sols/summary.xlsx',
+                    [(f'external:{result.min_capacities_filled}.xlsx', result) for _, result in rows])
+        if len(warm_start_steps) > 0:
+            data.write_warm_start_report(f'{subfolderpath}/sols/warmstart.txt', warm_start_steps)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""On-disk cache of built CP-SAT models"""
+import hashlib
+import json
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+from ortools import __version__ as ortools_version
+from models import Schedule
+from atomic import write_atomic
+
+# Entries are the index of the minimum capacity constraint, then the serialized model proto
+HEADER = struct.Struct('<q')
+FORMAT = 2 # Version of the entry layout, part of the key
+
+class ModelCache:
+    """Content-addressed cache of serialized model protos,
+    keyed by the schedule fingerprint and the constraint configuration.
+    Entries older than max_age are evicted, then the least recently used ones
+    until the cache fits in max_bytes.
+    Nothing is unpickled, so the directory can be shared.
+    """
+    def __init__(self, directory: str, max_bytes: int = 1024**3, max_age: float = 30*24*60*60):
+        """Args:
+            directory: where the entries are kept
+            max_bytes: the maximum total size of the entries
+            max_age: the maximum age of an entry since it was last used, in seconds
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @staticmethod
+    def key(schedule: Schedule, config: Any) -> str:
+        """Args:
+            schedule: the Schedule the model is built for
+            config: JSON-serializable description of the constraint families and their parameters
+        """
+        content = json.dumps([FORMAT, ortools_version, schedule.fingerprint, config], sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def __path(self, key: str) -> Path:
+        return self.directory / f'{key}.model'
+
+    def get(self, key: str) -> Optional[Tuple[bytes, int]]:
+        """Returns:
+            (serialized model proto, index of the minimum capacity constraint), or None if not cached
+        """
+        path = self.__path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = f.read()
+        except OSError:
+            return None
+        if len(entry) < HEADER.size:
+            return None
+        try:
+            os.utime(path) # Last used now
+        except FileNotFoundError:
+            pass # Evicted by another process since it was read
+        min_capacity_index, = HEADER.unpack_from(entry)
+        return entry[HEADER.size:], min_capacity_index
+
+    def put(self, key: str, proto: bytes, min_capacity_index: int):
+        """Store a model, then evict entries if the cache got too large"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.__path(key), HEADER.pack(min_capacity_index) + proto)
+        self.evict()
+
+    def evict(self):
+        """Remove the entries not used for max_age,
+        then the least recently used ones until the rest fits in max_bytes.
+        """
+        if not self.directory.exists():
+            return
+        now = time.time()
+        entries = []
+        try:
+            for path in self.directory.glob('*.model'):
+                stat = path.stat()
+                if now - stat.st_mtime > self.max_age:
+                    path.unlink()
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink()
+                total -= size
+        except FileNotFoundError:
+            pass # Evicted by another process meanwhile
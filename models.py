@@ -1,11 +1,17 @@
 from datetime import datetime, date, timedelta, tzinfo, time
+from bisect import bisect_left, bisect_right
+import hashlib
 from typing import List, Dict, Tuple, Set, Any, NewType
+import numpy as np
 UserId = NewType('UserId', Any)
 ShiftId = NewType('ShiftId', int)
 class Shift:
     """Shift timeframe and capacity
     Sorts based on begin time
+    The derived length, is_long, starts_early and ends_late
+    are computed once, on creation.
     """
+    __slots__ = ('id', 'begin', 'end', 'capacity', 'position', 'length', 'is_long', 'starts_early', 'ends_late')
     def __init__(self, id: ShiftId, begin: datetime, end: datetime, capacity: int, position: int):
         self.id = id
         assert begin < end
@@ -13,18 +19,10 @@ class Shift:
         self.end = end
         self.capacity = capacity
         self.position = position
-    @property
-    def length(self) -> timedelta:
-        return self.end - self.begin
-    @property
-    def is_long(self) -> bool:
-        return self.length > timedelta(hours=6)
-    @property
-    def starts_early(self) -> bool:
-        return self.begin.time() < time(9, 00)
-    @property
-    def ends_late(self) -> bool:
-        return self.end.time() > time(22,00) or self.begin.date() < self.end.date()
+        self.length: timedelta = end - begin
+        self.is_long: bool = self.length > timedelta(hours=6)
+        self.starts_early: bool = begin.time() < time(9, 00)
+        self.ends_late: bool = end.time() > time(22,00) or begin.date() < end.date()
     def __eq__(self, other: "Shift"):
         return ((self.begin, self.end, self.capacity) == (other.begin, other.end, other.capacity))
     def __ne__(self, other: "Shift"):
@@ -48,6 +46,7 @@ class Shift:
         return f'{self.begin}-{self.end} Capacity {self.capacity}'
 class User:
     """User requirements"""
+    __slots__ = ('id', 'positions', 'min_hours', 'max_hours', 'only_long', 'min_long', '_availabilities', '_availability_index')
     def __init__(self, id: UserId, positions: List[int], min_hours: float, max_hours: float, only_long: bool, min_long: int):
         self.id = id
         self.positions = positions
@@ -57,6 +56,7 @@ class User:
         self.only_long = only_long
         self.min_long = min_long
         self._availabilities = None
+        self._availability_index = None
     def can_take(self, shift: Shift) -> bool:
         return shift.position in self.positions and (not self.only_long or shift.is_long) 
     def set_availabilities_for(self, schedule):
@@ -66,26 +66,44 @@ class User:
         and set it to a member variable, accessible through a property.
         """
         self._availabilities = set()
-        for preference in schedule.preferences:
-            if preference.user == self:
-                self._availabilities.add((preference.shift.begin, preference.shift.end))
+        for shift in schedule.shifts_of_user.get(self.id, []):
+            self._availabilities.add((shift.begin, shift.end))
+        # Keep the intervals that aren't contained in one beginning earlier,
+        # so that sorted by begin, their ends are increasing too
+        begins, ends = [], []
+        for begin, end in sorted(self._availabilities):
+            if not ends or end > ends[-1]:
+                begins.append(begin)
+                ends.append(end)
+        self._availability_index = (begins, ends)
     @property
     def availabilities(self) -> Set[Tuple[datetime,datetime]]:
         if self._availabilities is None:
             raise ValueError("Availabilities accessed before having been set")
         return self._availabilities
+    @property
+    def availability_index(self) -> Tuple[List[datetime], List[datetime]]:
+        """The availability intervals not contained in another one,
+        sorted by begin and end.
+        Returns:
+            ([begin1, begin2, ...], [end1, end2, ...])
+        """
+        if self._availability_index is None:
+            raise ValueError("Availabilities accessed before having been set")
+        return self._availability_index
     def is_available_at(self, shift: Shift) -> bool:
         """Checks whether the user can take a shift,
         based on whether they have the necessary position,
         and if they're available at that time.
         """
-        for begin, end in self.availabilities:
-            if begin <= shift.begin <= end and begin <= shift.end <= end:
-                return True # User is available for this shift 
-        return False
+        begins, ends = self.availability_index
+        # The last interval beginning before the shift ends the latest
+        i = bisect_right(begins, shift.begin)
+        return i > 0 and shift.end <= ends[i-1]
 
 class ShiftPreference:
     """Stores a User-Shift relation with a preference score"""
+    __slots__ = ('user', 'shift', 'priority')
     def __init__(self, user: User, shift: Shift, priority: int):
         self.user = user
         self.shift = shift
@@ -95,6 +113,24 @@ class ShiftPreference:
             self.user == other.user and
             self.shift == other.shift
         ) # Ignore priority when checking equality
+    def __hash__(self):
+        return hash((self.user, self.shift.begin, self.shift.end, self.shift.capacity))
+class ShiftArrays:
+    """Array-backed view of a list of shifts, in the same order.
+    Times are in epoch seconds, lengths in seconds.
+    """
+    __slots__ = ('ids', 'index', 'begin', 'end', 'length', 'capacity', 'position', 'is_long', 'starts_early', 'ends_late')
+    def __init__(self, shifts: List[Shift]):
+        self.ids = np.array([s.id for s in shifts], dtype=np.int64)
+        self.index = {s.id:i for i, s in enumerate(shifts)} # row of each shift id
+        self.begin = np.array([int(s.begin.timestamp()) for s in shifts], dtype=np.int64)
+        self.end = np.array([int(s.end.timestamp()) for s in shifts], dtype=np.int64)
+        self.length = self.end - self.begin
+        self.capacity = np.array([s.capacity for s in shifts], dtype=np.int64)
+        self.position = np.array([s.position for s in shifts], dtype=np.int64)
+        self.is_long = np.array([s.is_long for s in shifts], dtype=bool)
+        self.starts_early = np.array([s.starts_early for s in shifts], dtype=bool)
+        self.ends_late = np.array([s.ends_late for s in shifts], dtype=bool)
 class Schedule:
     """Schedule information"""
     def __init__(self, users: List[User], shifts: List[Shift], preferences: List[ShiftPreference]):
@@ -104,7 +140,29 @@ class Schedule:
         self._shifts_for_day = None
         self.user = {u.id:u for u in users} # index id
         self.shift = {s.id:s for s in shifts} # index id
+        self.arrays = ShiftArrays(shifts)
         self._preference = None
+        self._nosleep_shifts = None
+        self._shifts_of_user = None
+        self._users_of_shift = None
+        self._shifts_of_user_for_day = None
+        self._fingerprint = None
+    @property
+    def fingerprint(self) -> str:
+        """Hash of everything the model is built from, in the order it's built in,
+        so equal fingerprints give the same model, with the same variable indices.
+        """
+        if self._fingerprint is not None:
+            return self._fingerprint # cached result
+        h = hashlib.sha256()
+        for s in self.shifts:
+            h.update(repr(('shift', s.id, s.begin.isoformat(), s.end.isoformat(), s.capacity, s.position)).encode())
+        for u in self.users:
+            h.update(repr(('user', u.id, u.positions, u.min_hours, u.max_hours, u.only_long, u.min_long)).encode())
+        for p in self.preferences:
+            h.update(repr(('preference', p.shift.id, p.user.id, p.priority)).encode())
+        self._fingerprint = h.hexdigest()
+        return self._fingerprint
     @property
     def shifts_for_day(self) -> Dict[date, List[Shift]]:
         """Collects shifts for a given day for each day, 
@@ -139,6 +197,77 @@ class Schedule:
         for pref in self.preferences:
             self._preference[pref.shift.id, pref.user.id] = pref.priority
         return self._preference
+    @property
+    def shifts_of_user(self) -> Dict[UserId, List[Shift]]:
+        """Collect the shifts each user has a preference for,
+        in the order of self.shifts. Users without preferences are left out.
+        Returns:
+            dict[user_id] = [s1, s2, ...]
+        """
+        if self._shifts_of_user is not None:
+            return self._shifts_of_user # cached result
+        position = {s.id:i for i, s in enumerate(self.shifts)}
+        self._shifts_of_user = dict()
+        for shift_id, user_id in self.preference.keys():
+            self._shifts_of_user.setdefault(user_id, []).append(self.shift[shift_id])
+        for lst in self._shifts_of_user.values():
+            lst.sort(key=lambda s: position[s.id])
+        return self._shifts_of_user
+    @property
+    def users_of_shift(self) -> Dict[ShiftId, List[User]]:
+        """Collect the users that have a preference for each shift,
+        in the order of self.users. Shifts without preferences are left out.
+        Returns:
+            dict[shift_id] = [u1, u2, ...]
+        """
+        if self._users_of_shift is not None:
+            return self._users_of_shift # cached result
+        position = {u.id:i for i, u in enumerate(self.users)}
+        self._users_of_shift = dict()
+        for shift_id, user_id in self.preference.keys():
+            self._users_of_shift.setdefault(shift_id, []).append(self.user[user_id])
+        for lst in self._users_of_shift.values():
+            lst.sort(key=lambda u: position[u.id])
+        return self._users_of_shift
+    @property
+    def shifts_of_user_for_day(self) -> Dict[UserId, Dict[date, List[Shift]]]:
+        """Collect the shifts each user has a preference for on each day,
+        with the days and shifts in the order of shifts_for_day.
+        Days without preferences are left out.
+        Returns:
+            dict[user_id][date] = [s1, s2, ...]
+        """
+        if self._shifts_of_user_for_day is not None:
+            return self._shifts_of_user_for_day # cached result
+        self._shifts_of_user_for_day = dict()
+        for day, shifts in self.shifts_for_day.items():
+            for shift in shifts:
+                for user in self.users_of_shift.get(shift.id, []):
+                    self._shifts_of_user_for_day.setdefault(user.id, dict()).setdefault(day, []).append(shift)
+        return self._shifts_of_user_for_day
+    @property
+    def nosleep_shifts(self) -> Set[Tuple[ShiftId, ShiftId]]:
+        """Collect pairs of shifts that conflict in the following way:
+        The time between the end of one and the begin of the other is
+        less than 11 hours for long shifts, and 9 hours for non-long.
+        The shifts are sorted by begin time once, and the shifts beginning
+        in the rest period after each shift are found by binary search.
+        Returns:
+            {(earlier_shift_id, later_shift_id), ...}
+        """
+        if self._nosleep_shifts is not None:
+            return self._nosleep_shifts # cached result
+        a = self.arrays
+        by_begin = np.argsort(a.begin, kind='stable')
+        begins = a.begin[by_begin]
+        rest = np.where(a.is_long, 11*60*60, 9*60*60)
+        first = np.searchsorted(begins, a.end, side='right') # begins after the end
+        last = np.searchsorted(begins, a.end + rest, side='right') # begins within the rest period
+        self._nosleep_shifts = set()
+        for i, shift_id in enumerate(a.ids.tolist()):
+            for other_shift_id in a.ids[by_begin[first[i]:last[i]]].tolist():
+                self._nosleep_shifts.add((shift_id, other_shift_id))
+        return self._nosleep_shifts
     def add_forced_availabilities(self):
         """Create valid ShiftPreferences for cases where
         the user is available at the time of a shift
@@ -146,16 +275,79 @@ class Schedule:
         and they can take the shift based on their positions,
         but they didn't originally sign up for that shift.
         """
-        self._preference = None # Force recalculate preference cache
+        self.reset_preference_caches()
+        by_begin = sorted(self.shifts, key=lambda s: s.begin)
+        begins = [s.begin for s in by_begin]
+        existing = set(self.preferences)
         for user in self.users:
             user.set_availabilities_for(schedule=self) # Calculate availability intervals
-            for shift in self.shifts:
-                if user.can_take(shift) and user.is_available_at(shift):
+            # Collect the shifts within the availability intervals, in the order of self.shifts
+            available_rows = set()
+            for begin, end in zip(*user.availability_index):
+                for shift in by_begin[bisect_left(begins, begin):bisect_right(begins, end)]:
+                    if shift.end <= end:
+                        available_rows.add(self.arrays.index[shift.id])
+            for row in sorted(available_rows):
+                shift = self.shifts[row]
+                if user.can_take(shift):
                     sp = ShiftPreference(
                         user=user,
                         shift=shift,
                         priority=100 # very low priority
                     )
-                    if sp not in self.preferences:
+                    if sp not in existing:
                         # Avoid overriding existing preferences
-                        self.preferences.append(sp)
\ No newline at end of file
+                        existing.add(sp)
+                        self.preferences.append(sp)
+        self.reset_preference_caches()
+    def apply_delta(self,
+            users: Dict[UserId, Dict[str, Any]] = None,
+            shifts: Dict[ShiftId, Dict[str, Any]] = None,
+            preferences: Dict[UserId, Dict[ShiftId, Any]] = None) -> Tuple[Set[UserId], Set[ShiftId]]:
+        """Change the requirements of existing users, the capacity of existing shifts,
+        and the preferences of users.
+        Shift times can't be changed, as that would change the conflicts of everyone.
+        Args:
+            users: users[user_id] = {'min_hours': h1, 'max_hours': h2, 'only_long': b, 'min_long': n, 'positions': [...]},
+                any subset of the fields
+            shifts: shifts[shift_id] = {'capacity': n}
+            preferences: preferences[user_id][shift_id] = priority, or None to remove the preference
+        Returns:
+            (ids of the users changed, ids of the shifts changed)
+        """
+        users, shifts, preferences = users or {}, shifts or {}, preferences or {}
+        for user_id, fields in users.items():
+            for field, value in fields.items():
+                if field not in ('min_hours', 'max_hours', 'only_long', 'min_long', 'positions'):
+                    raise ValueError(f'Unknown or unchangeable user field {field}')
+                setattr(self.user[user_id], field, value)
+        for shift_id, fields in shifts.items():
+            for field, value in fields.items():
+                if field != 'capacity':
+                    raise ValueError(f'Only the capacity of a shift can be changed, not {field}')
+                self.shift[shift_id].capacity = value
+                self.arrays.capacity[self.arrays.index[shift_id]] = value
+        if preferences:
+            kept = []
+            for pref in self.preferences:
+                changes = preferences.get(pref.user.id, {})
+                if pref.shift.id not in changes:
+                    kept.append(pref)
+                elif changes[pref.shift.id] is not None:
+                    pref.priority = changes[pref.shift.id]
+                    kept.append(pref)
+            existing = {(p.shift.id, p.user.id) for p in kept}
+            for user_id, changes in preferences.items():
+                for shift_id, priority in changes.items():
+                    if priority is not None and (shift_id, user_id) not in existing:
+                        kept.append(ShiftPreference(user=self.user[user_id], shift=self.shift[shift_id], priority=priority))
+            self.preferences[:] = kept
+        self.reset_preference_caches()
+        return set(users) | set(preferences), set(shifts)
+    def reset_preference_caches(self):
+        """Force recalculating the caches derived from the preferences"""
+        self._preference = None
+        self._shifts_of_user = None
+        self._users_of_shift = None
+        self._shifts_of_user_for_day = None
+        self._fingerprint = None
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Solving capacity levels in a pool of worker processes"""
+import os
+from multiprocessing import Pool
+from typing import Iterable, Iterator, Optional
+import data
+from solver import ShiftSolver, LevelResult
+from model_cache import ModelCache
+from solution_store import SolutionStore
+
+# State of a worker process, set once by _init_worker
+_solver = None
+_timeout = None
+_warm_start = True
+_encoding = 'pairwise'
+_hint = None
+
+def _init_worker(jsondata: dict, force_available: bool, search_workers: int, timeout: Optional[int], warm_start: bool, encoding: str,
+        trace_memory: bool, parameters: Optional[dict], model_cache: Optional[ModelCache], solution_store: Optional[SolutionStore]):
+    """Build the Schedule from the JSON once, and keep a solver for it"""
+    global _solver, _timeout, _warm_start, _encoding
+    schedule = data.load_data(jsondata)
+    if force_available:
+        schedule.add_forced_availabilities()
+    _solver = ShiftSolver(schedule, trace_memory=trace_memory, model_cache=model_cache, solution_store=solution_store)
+    _solver.parameters.num_search_workers = search_workers
+    if parameters is not None:
+        _solver.SetParameters(parameters)
+    _timeout = timeout
+    _warm_start = warm_start
+    _encoding = encoding
+
+def _solve_level(n: int) -> LevelResult:
+    """Solve a level on the model kept by this worker,
+    using the last solution of this worker as a hint.
+    """
+    global _hint
+    found = _solver.SolveLevel(n, timeout=_timeout, hint=_hint, encoding=_encoding)
+    result = LevelResult(_solver, n)
+    if _warm_start and found:
+        _hint = result.Values
+    return result
+
+def search_workers_per_job(jobs: int, cores: Optional[int] = None) -> int:
+    """Split the cores between the worker processes,
+    so that their CP-SAT search workers don't oversubscribe the machine.
+    """
+    if cores is None:
+        cores = os.cpu_count() or 1
+    return max(1, cores // jobs)
+
+def solve_levels(jsondata: dict, levels: Iterable[int], jobs: int, timeout: Optional[int] = None,
+        force_available: bool = False, warm_start: bool = True, encoding: str = 'pairwise',
+        trace_memory: bool = False, parameters: Optional[dict] = None,
+        model_cache: Optional[ModelCache] = None, solution_store: Optional[SolutionStore] = None) -> Iterator[LevelResult]:
+    """Solve the capacity levels in a pool of worker processes
+    Args:
+        jsondata: the schedule data, as accepted by data.load_data
+        levels: the min_capacities_filled levels to solve for
+        jobs: number of worker processes
+        timeout: number of seconds that the solver can take on each level
+        force_available: extend the preferences with Schedule.add_forced_availabilities
+        warm_start: hint each level with the previous solution of the same worker
+        encoding: one of solver.ENCODINGS, how conflicting shifts are encoded
+        trace_memory: record the peak Python heap of building each constraint family in the build stats
+        parameters: CP-SAT parameters of each worker, overriding the split num_search_workers
+        model_cache: load the model of each worker from, and store it in this cache
+        solution_store: answer, hint and store the levels with this store
+    Yields:
+        LevelResult for each level, in the order of levels.
+        The pool is terminated when the iterator is closed.
+    """
+    initargs = (jsondata, force_available, search_workers_per_job(jobs), timeout, warm_start, encoding, trace_memory, parameters, model_cache, solution_store)
+    with Pool(jobs, initializer=_init_worker, initargs=initargs) as pool:
+        yield from pool.imap(_solve_level, levels)
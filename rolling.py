@@ -0,0 +1,133 @@
+"""Solving long schedules in overlapping windows of days
+
+Each window is solved as a model of its own days, plus the shifts assigned
+in the earlier windows, fixed to assigned. That carries over the rest periods
+and conflicts at the boundary, the hours worked and the number of shifts taken.
+The minimum hours and the minimum capacity filled are required in proportion
+to the days up to the end of the window, as far as the shifts up to its end allow,
+and at least what the shifts after it can't make up for. The last window requires them fully.
+"""
+from typing import Dict, List, Optional, Tuple, Any
+from models import Schedule, User, ShiftPreference, ShiftId, UserId
+from solver import ShiftSolver, SolutionSnapshot, LevelResult
+
+def window_schedule(schedule: Schedule, days: set, committed: Dict[Tuple[ShiftId, UserId], int], min_hours: Dict[UserId, float]) -> Schedule:
+    """The part of the schedule a window solves
+    Args:
+        schedule: the whole schedule
+        days: the days of the window
+        committed: assigned[shift_id, user_id] = 1 for the shifts assigned in earlier windows
+        min_hours: min_hours[user_id] = the hours required by the end of the window
+    Returns:
+        Schedule of the shifts on the days of the window and the committed shifts,
+        with copies of the users with these min_hours
+    """
+    users = [User(id=u.id, positions=u.positions, min_hours=min_hours[u.id], max_hours=u.max_hours,
+        only_long=u.only_long, min_long=u.min_long) for u in schedule.users]
+    user = {u.id:u for u in users}
+    committed_shifts = {shift_id for shift_id, _ in committed}
+    shifts = [s for s in schedule.shifts if s.begin.date() in days or s.id in committed_shifts]
+    preferences = [
+        ShiftPreference(user=user[p.user.id], shift=p.shift, priority=p.priority)
+        for p in schedule.preferences
+        if (p.shift.id, p.user.id) in committed or p.shift.begin.date() in days
+    ]
+    return Schedule(users, shifts, preferences)
+
+class RollingResult(LevelResult):
+    """Stitched solution of the windows, as a LevelResult.
+    The stitched solution is never proven optimal, so it's FEASIBLE at best.
+    """
+    def __init__(self, schedule: Schedule, min_capacities_filled: int, values: Optional[dict], windows: List[dict]):
+        self.min_capacities_filled = min_capacities_filled
+        self.found = values is not None
+        self.windows = windows
+        self._status_name = 'FEASIBLE' if self.found else 'INFEASIBLE'
+        self._wall_time = sum(w['wall_time'] for w in windows)
+        self.FirstSolutionTime = None
+        # Without a solution, the totals are taken from an empty one
+        snapshot = SolutionSnapshot(schedule, values if self.found else dict.fromkeys(schedule.preference, 0))
+        self.NShifts = len(schedule.shifts)
+        self.NCapacities = snapshot.n_capacities
+        self.Hours = snapshot.hours
+        self.NPeople = len(schedule.users)
+        self.Stats = {'windows': windows}
+        self.Snapshot = snapshot if self.found else None
+
+def solve_rolling(schedule: Schedule, min_capacities_filled: int, window: int = 7, step: Optional[int] = None,
+        timeout: Optional[int] = None, encoding: str = 'pairwise', parameters: Optional[Dict[str, Any]] = None) -> RollingResult:
+    """Solve the schedule in windows of days, moving by step days,
+    committing the assignments of the first step days of each window, and every day of the last one.
+    Args:
+        schedule: the Schedule to solve for
+        min_capacities_filled: the minimum capacities filled in the whole schedule
+        window: number of days in a window
+        step: number of days committed from each window, at most window, by default half of it
+        timeout: number of seconds that the solver can take on each window
+        encoding: one of solver.ENCODINGS, how conflicting shifts are encoded
+        parameters: CP-SAT parameters, see ShiftSolver.SetParameters
+    Returns:
+        RollingResult, without a solution if a window was infeasible
+    """
+    if step is None:
+        step = max(1, window // 2)
+    if not 1 <= step <= window:
+        raise ValueError(f'The step should be between 1 and the window size {window}, not {step}')
+    days = list(schedule.shifts_for_day)
+    day_capacity = {day:sum(s.capacity for s in shifts) for day, shifts in schedule.shifts_for_day.items()}
+    total_capacity = sum(day_capacity.values())
+    # The capacities that can be filled, and the hours each user can work on each day, at most
+    day_fillable = {day:0 for day in days}
+    day_hours = {u.id:{day:0.0 for day in days} for u in schedule.users}
+    for day, shifts in schedule.shifts_for_day.items():
+        for s in shifts:
+            users_of_shift = schedule.users_of_shift.get(s.id, [])
+            day_fillable[day] += min(s.capacity, len(users_of_shift))
+            for u in users_of_shift:
+                day_hours[u.id][day] += s.length.total_seconds() / (60*60)
+    committed = dict()
+    windows = []
+    hint = None
+    start = 0
+    while start < len(days):
+        window_days = days[start:start+window]
+        last = start + window >= len(days)
+        commit_days = set(window_days if last else days[start:start+step])
+        # Require in proportion to the days up to the end of the window, as far as the committed shifts
+        # and the window allow, and at least what the days after it can't make up for
+        after = days[start+len(window_days):]
+        ratio = (len(days) - len(after)) / len(days)
+        capacity_ratio = sum(day_capacity[d] for d in days[:len(days)-len(after)]) / total_capacity
+        committed_hours = {u.id:0.0 for u in schedule.users}
+        for shift_id, user_id in committed:
+            committed_hours[user_id] += schedule.shift[shift_id].length.total_seconds() / (60*60)
+        min_hours = {u.id:max(
+            u.min_hours - sum(day_hours[u.id][d] for d in after),
+            min(u.min_hours * ratio, committed_hours[u.id] + sum(day_hours[u.id][d] for d in window_days)),
+            0) for u in schedule.users}
+        n = int(max(
+            min_capacities_filled - sum(day_fillable[d] for d in after),
+            min(min_capacities_filled * capacity_ratio, len(committed) + sum(day_fillable[d] for d in window_days)),
+            0))
+        sub = window_schedule(schedule, set(window_days), committed, min_hours)
+        solver = ShiftSolver(sub, parameters=parameters)
+        solver.BuildModel(n, encoding)
+        variables = solver.Model.Proto().variables
+        for key in committed:
+            variables[solver.Model.variables[key].Index()].domain[:] = [1, 1]
+        found = solver.SolveLevel(n, timeout=timeout, hint=hint)
+        windows.append({
+            'days': [window_days[0].isoformat(), window_days[-1].isoformat()],
+            'min_capacities_filled': n,
+            'status': solver.StatusName(),
+            'wall_time': solver.WallTime(),
+        })
+        if not found:
+            return RollingResult(schedule, min_capacities_filled, None, windows)
+        hint = solver.Values
+        for (shift_id, user_id), assigned in hint.items():
+            if assigned and schedule.shift[shift_id].begin.date() in commit_days:
+                committed[shift_id, user_id] = 1
+        start += len(window_days) if last else step
+    values = {key:committed.get(key, 0) for key in schedule.preference}
+    return RollingResult(schedule, min_capacities_filled, values, windows)
@@ -0,0 +1,53 @@
+"""Persistent store of the solutions of capacity levels"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from models import Schedule
+from atomic import write_atomic
+
+class SolutionStore:
+    """Keeps the best known assignment of each capacity level,
+    with its status and objective, keyed by the schedule fingerprint,
+    the constraint configuration and min_capacities_filled.
+    """
+    def __init__(self, directory: str):
+        """Args:
+            directory: where the solutions are kept
+        """
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(schedule: Schedule, config: Any, min_capacities_filled: int) -> str:
+        """Args:
+            schedule: the Schedule the solution is for
+            config: JSON-serializable description of the constraint families and their parameters
+            min_capacities_filled: the capacity level
+        """
+        content = json.dumps([schedule.fingerprint, config, min_capacities_filled], sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def __path(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns:
+            {'status': 'OPTIMAL' | 'FEASIBLE', 'objective': float, 'values': assigned[shift_id, person_id]},
+            or None if there's no solution stored
+        """
+        try:
+            with open(self.__path(key), 'r', encoding='utf8') as jsonfile:
+                stored = json.load(jsonfile)
+        except (OSError, ValueError):
+            return None
+        stored['values'] = {(shift_id, user_id):assigned for shift_id, user_id, assigned in stored['values']}
+        return stored
+
+    def put(self, key: str, status: str, objective: float, values: Dict[Tuple[Any, Any], int]):
+        """Store a solution, replacing the one stored before"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.__path(key), json.dumps({
+            'status': status,
+            'objective': objective,
+            'values': [[shift_id, user_id, assigned] for (shift_id, user_id), assigned in values.items()]
+        }, ensure_ascii=False).encode('utf8'))
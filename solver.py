@@ -1,8 +1,125 @@
 from ortools.sat.python import cp_model
-from itertools import combinations, permutations
-from models import Schedule, Shift, ShiftId, User, ShiftPreference
-from typing import List, Dict, Any, NoReturn, Tuple, Set, Iterable, Optional
+from ortools.sat import cp_model_pb2
+from models import Schedule, Shift, ShiftId, User, UserId, ShiftPreference
+from model_cache import ModelCache
+from solution_store import SolutionStore
+from typing import List, Dict, Any, NoReturn, Tuple, Set, Iterable, Iterator, Optional, Hashable, Callable, Union
 from datetime import timedelta
+from contextlib import contextmanager
+from functools import wraps
+import time
+import tracemalloc
+import numpy as np
+
+# Ways to encode that a user can't take two conflicting shifts
+ENCODINGS = (
+    'pairwise', # one constraint for each conflicting pair
+    'clique', # one AtMostOne for each maximal clique of conflicting shifts
+    'nooverlap', # one NoOverlap for each user, of optional intervals padded with the rest period
+)
+
+def maximal_cliques(intervals: Iterable[Tuple[Any, Any, Hashable]]) -> List[List[Hashable]]:
+    """List the maximal cliques of the interval graph of closed intervals,
+    with a single pass over the sorted endpoints.
+    A clique is maximal when an interval ends right after others began.
+    Args:
+        intervals: [(begin, end, key), ...]
+    Returns:
+        [[key1, key2, ...], ...] the keys of the intervals in each maximal clique
+    """
+    events = [(begin, 0, key) for begin, end, key in intervals]
+    events += [(end, 1, key) for begin, end, key in intervals]
+    # Begins before ends at the same time, as touching intervals overlap
+    events.sort(key=lambda e: (e[0], e[1]))
+    cliques = []
+    active = dict() # ordered set of the intervals that began but didn't end
+    last_was_begin = False
+    for _, is_end, key in events:
+        if is_end:
+            if last_was_begin:
+                cliques.append(list(active))
+            del active[key]
+            last_was_begin = False
+        else:
+            active[key] = None
+            last_was_begin = True
+    return cliques
+
+def count_literals(constraint) -> int:
+    """Count the variables and literals a constraint proto refers to,
+    including its enforcement literals.
+    """
+    n = len(constraint.enforcement_literal)
+    kind = constraint.WhichOneof('constraint')
+    if kind == 'linear':
+        n += len(constraint.linear.vars)
+    elif kind in ('bool_or', 'bool_and', 'at_most_one', 'bool_xor'):
+        n += len(getattr(constraint, kind).literals)
+    elif kind == 'no_overlap':
+        n += len(constraint.no_overlap.intervals)
+    return n
+
+class BuildStats:
+    """Wall time, size and peak traced memory of building
+    each constraint family of a ShiftModel.
+    Building the same family again adds to its numbers.
+    The peak memory is the peak of the Python heap traced by tracemalloc.
+    The model proto is allocated by protobuf's C++ backend, which isn't traced,
+    so it leaves out most of the memory of the model; benchmarks.scaling samples the RSS.
+    It is None when it wasn't traced.
+    """
+    def __init__(self):
+        self.families = dict() # families[name] = {'wall_time', 'constraints', 'literals', 'peak_memory'}
+
+    def record(self, name: str, wall_time: float, constraints: int, literals: int, peak_memory: int):
+        """Args:
+            name: name of the constraint family
+            wall_time: seconds spent building it
+            constraints: number of constraints added
+            literals: number of variables and literals the added constraints refer to
+            peak_memory: peak of the Python heap allocated while building it in bytes, or None
+        """
+        family = self.families.setdefault(name, {'wall_time': 0.0, 'constraints': 0, 'literals': 0, 'peak_memory': None})
+        family['wall_time'] += wall_time
+        family['constraints'] += constraints
+        family['literals'] += literals
+        if peak_memory is not None:
+            family['peak_memory'] = max(family['peak_memory'] or 0, peak_memory)
+
+    @property
+    def WallTime(self) -> float:
+        return sum(f['wall_time'] for f in self.families.values())
+
+    @property
+    def NConstraints(self) -> int:
+        return sum(f['constraints'] for f in self.families.values())
+
+    @property
+    def NLiterals(self) -> int:
+        return sum(f['literals'] for f in self.families.values())
+
+    @property
+    def PeakMemory(self) -> Optional[int]:
+        return max([f['peak_memory'] for f in self.families.values() if f['peak_memory'] is not None], default=None)
+
+    def to_dict(self) -> dict:
+        return {
+            'wall_time': self.WallTime,
+            'constraints': self.NConstraints,
+            'literals': self.NLiterals,
+            'peak_memory': self.PeakMemory,
+            'families': {name:dict(family) for name, family in self.families.items()},
+        }
+
+def measured(method):
+    """Record the building of a ShiftModel constraint family in its build_stats,
+    under the name of the method. Families built by another one are counted in the outer one.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.measure(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class ShiftModel(cp_model.CpModel):
     """Shift solver
@@ -12,118 +129,399 @@ class ShiftModel(cp_model.CpModel):
     Then provides an optimal solution (if one exists)
     for the given parameters.
     """
-    def __init__(self, schedule: Schedule):
+    def __init__(self, schedule: Schedule, encoding: str = 'pairwise', trace_memory: bool = False,
+            cached: Optional[Tuple[bytes, int]] = None):
         """Args:
             schedule: the Schedule to solver for
+            encoding: one of ENCODINGS, how AddNoConflict and AddSleep encode conflicts
+            trace_memory: record the peak Python heap of building each constraint family in build_stats,
+                which slows down building it
+            cached: (serialized proto, min capacity index) from a ModelCache,
+                to load the constraints from instead of adding them
         """
         super().__init__()
+        if encoding not in ENCODINGS:
+            raise ValueError(f'Unknown encoding {encoding}, use one of {ENCODINGS}')
         self.schedule = schedule
-        self.variables = { # Create solver variables
-            (p.shift.id, p.user.id):self.NewBoolVar(f'{p.user.id} works {p.shift.id}')
-            for p in self.schedule.preferences
-            }  
+        self.encoding = encoding
+        self.cliques = dict() # cliques[user_id] = [indices of the AtMostOne constraints] of the clique encoding
+        self.intervals = dict() # intervals[user_id] = [(shift row, index of the interval constraint)] of the nooverlap encoding
+        self.user_constraints = dict() # user_constraints[user_id] = [indices of the constraints added for the user]
+        self.shift_constraints = dict() # shift_constraints[shift_id] = [indices of the constraints added for the shift]
+        self.patchable = cached is None # The constraints of a loaded model aren't tracked
+        self.build_stats = BuildStats()
+        self.trace_memory = trace_memory
+        self.__measuring = False
+        with self.measure('Variables'):
+            self.variables = { # Create solver variables
+                (p.shift.id, p.user.id):self.NewBoolVar(f'{p.user.id} works {p.shift.id}')
+                for p in self.schedule.preferences
+                }  
+        if cached is not None:
+            with self.measure('LoadProto'):
+                self.LoadProto(*cached)
+            return
         # Add must-have-constraints
         self.AddNoConflict()
 
-    def AddMaxDailyShifts(self, n: int = 1):
+    def LoadProto(self, serialized: bytes, min_capacity_index: int):
+        """Load the constraints and the objective of a serialized ShiftModel
+        of the same schedule and encoding, whose first variables are the ones of self.variables.
+        Its other variables, e.g. the constants of intervals, are appended.
+        Args:
+            serialized: the serialized model proto
+            min_capacity_index: the index of the constraint of AddMinimumCapacityFilledNumber
+        """
+        cached = cp_model_pb2.CpModelProto()
+        cached.ParseFromString(serialized)
+        proto = self.Proto()
+        if len(cached.variables) < len(proto.variables):
+            raise ValueError('The serialized model has fewer variables than the schedule has preferences')
+        proto.variables.extend(cached.variables[len(proto.variables):])
+        proto.constraints.extend(cached.constraints)
+        proto.objective.CopyFrom(cached.objective)
+        self.min_capacity_index = min_capacity_index
+
+    @contextmanager
+    def measure(self, name: str):
+        """Record the wall time, the constraints and literals added,
+        and with trace_memory, the peak of the Python heap allocated in the block in build_stats.
+        Nested blocks are counted in the outermost one.
+        """
+        if self.__measuring:
+            yield
+            return
+        self.__measuring = True
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory and hasattr(tracemalloc, 'reset_peak'): # Python 3.9+
+            tracemalloc.reset_peak()
+        if self.trace_memory:
+            memory_before, _ = tracemalloc.get_traced_memory()
+        n_constraints = len(self.Proto().constraints)
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - begin
+            peak_memory = None
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak_memory = max(0, peak - memory_before)
+            if started_tracing:
+                tracemalloc.stop()
+            added = self.Proto().constraints[n_constraints:]
+            self.build_stats.record(name,
+                wall_time=wall_time,
+                constraints=len(added),
+                literals=sum(count_literals(ct) for ct in added),
+                peak_memory=peak_memory)
+            self.__measuring = False
+
+    def each_user(self, users: Optional[Iterable[UserId]] = None) -> Iterator[User]:
+        """Iterate over the users, or the ones with the given ids, in the order of schedule.users,
+        recording the constraints added in the loop body for each in user_constraints.
+        """
+        if users is None:
+            selected = self.schedule.users
+        else:
+            ids = set(users)
+            selected = [u for u in self.schedule.users if u.id in ids]
+        for u in selected:
+            begin = len(self.Proto().constraints)
+            yield u
+            self.user_constraints.setdefault(u.id, []).extend(range(begin, len(self.Proto().constraints)))
+
+    def each_shift(self, shifts: Optional[Iterable[ShiftId]] = None) -> Iterator[Shift]:
+        """Iterate over the shifts, or the ones with the given ids, in the order of schedule.shifts,
+        recording the constraints added in the loop body for each in shift_constraints.
+        """
+        if shifts is None:
+            selected = self.schedule.shifts
+        else:
+            ids = set(shifts)
+            selected = [s for s in self.schedule.shifts if s.id in ids]
+        for s in selected:
+            begin = len(self.Proto().constraints)
+            yield s
+            self.shift_constraints.setdefault(s.id, []).extend(range(begin, len(self.Proto().constraints)))
+
+    @measured
+    def Patch(self, families: Iterable[Tuple[str, tuple]], users: Iterable[UserId] = (), shifts: Iterable[ShiftId] = ()):
+        """Update the model after the schedule changed for some users and shifts.
+        The variables of removed preferences are fixed to 0, new ones are created
+        and added to the objective and the minimum capacity constraint,
+        and the priorities are updated in the objective.
+        Then the constraints of the users and shifts, and of the shifts
+        whose users changed, are cleared and added again.
+        Args:
+            families: the constraint families the model was built with, as (method name, arguments),
+                except for the minimum capacity and the objective
+            users: ids of the users whose preferences or requirements changed
+            shifts: ids of the shifts whose capacity changed
+        """
+        if not self.patchable:
+            raise ValueError('The constraints of a model loaded from a proto are not tracked, rebuild it instead')
+        users, shifts = set(users), set(shifts)
+        proto = self.Proto()
+        preference = self.schedule.preference
+        removed = [key for key in self.variables if key[1] in users and key not in preference]
+        added = [(s.id, user_id) for user_id in users for s in self.schedule.shifts_of_user.get(user_id, [])
+            if (s.id, user_id) not in self.variables]
+        shifts.update(shift_id for shift_id, _ in removed + added)
+        for owners, keys in ((self.user_constraints, users), (self.shift_constraints, shifts)):
+            for key in keys:
+                for index in owners.pop(key, []):
+                    proto.constraints[index].Clear()
+        for user_id in users:
+            self.intervals.pop(user_id, None)
+            self.cliques.pop(user_id, None)
+        for key in removed:
+            proto.variables[self.variables.pop(key).Index()].domain[:] = [0, 0]
+        for shift_id, user_id in added:
+            self.variables[shift_id, user_id] = self.NewBoolVar(f'{user_id} works {shift_id}')
+            min_capacity = proto.constraints[self.min_capacity_index].linear
+            min_capacity.vars.append(self.variables[shift_id, user_id].Index())
+            min_capacity.coeffs.append(1)
+        # Set the objective coefficients of the users' variables
+        objective = {index:i for i, index in enumerate(proto.objective.vars)}
+        for user_id in users:
+            for s in self.schedule.shifts_of_user.get(user_id, []):
+                index = self.variables[s.id, user_id].Index()
+                if index in objective:
+                    proto.objective.coeffs[objective[index]] = preference[s.id, user_id]
+                else:
+                    proto.objective.vars.append(index)
+                    proto.objective.coeffs.append(preference[s.id, user_id])
+        for name, args in families:
+            if name == 'AddShiftCapacity':
+                getattr(self, name)(*args, shifts=shifts)
+            else:
+                getattr(self, name)(*args, users=users)
+
+    @measured
+    def AddMaxDailyShifts(self, n: int = 1, users: Optional[Iterable[UserId]] = None):
         """Make sure that employees only get assigned to
         maximum of n shifts on any given day.
         Args:
             n: the max number of shifts a person can work on any day.
+            users: only add the constraints of the users with these ids
         """
-        for u in self.schedule.users:
-            for shifts_for_day in self.schedule.shifts_for_day.values():
-                self.AddLinearConstraint(sum([self.variables[s.id,u.id] for s in shifts_for_day if (s.id,u.id) in self.variables]), 0, n)
+        for u in self.each_user(users):
+            for shifts_for_day in self.schedule.shifts_of_user_for_day.get(u.id, {}).values():
+                self.AddLinearConstraint(sum([self.variables[s.id,u.id] for s in shifts_for_day]), 0, n)
 
-    def AddShiftCapacity(self):
-        """Make sure that no more people are assigned to a shift than its capacity"""
-        for s in self.schedule.shifts:
+    @measured
+    def AddShiftCapacity(self, shifts: Optional[Iterable[ShiftId]] = None):
+        """Make sure that no more people are assigned to a shift than its capacity
+        Args:
+            shifts: only add the constraints of the shifts with these ids
+        """
+        for s in self.each_shift(shifts):
             self.AddLinearConstraint(
-                sum([self.variables[s.id,u.id] for u in self.schedule.users
-                if (s.id,u.id) in self.variables]), 0, s.capacity)
+                sum([self.variables[s.id,u.id] for u in self.schedule.users_of_shift.get(s.id, [])]), 0, s.capacity)
 
+    @measured
     def AddMinimumCapacityFilledNumber(self, n: int):
         """Make sure that at least n out of the sum(capacities) is filled.
+        The constraint is kept, so that its bound can be moved
+        with SetMinimumCapacityFilledNumber.
+        """
+        self.min_capacity_index = self.Add(sum([assigned_val for assigned_val in self.variables.values()]) >= n).Index()
+
+    def SetMinimumCapacityFilledNumber(self, n: int):
+        """Move the bound of the constraint added by AddMinimumCapacityFilledNumber,
+        leaving the rest of the model untouched.
         """
-        self.Add(sum([assigned_val for assigned_val in self.variables.values()]) >= n)
+        self.Proto().constraints[self.min_capacity_index].linear.domain[0] = n
 
-    def AddMinMaxWorkTime(self):
+    def GetMinimumCapacityFilledNumber(self) -> int:
+        """The current bound of the constraint added by AddMinimumCapacityFilledNumber"""
+        return self.Proto().constraints[self.min_capacity_index].linear.domain[0]
+
+    @measured
+    def AddMinMaxWorkTime(self, users: Optional[Iterable[UserId]] = None):
         """Make sure that everyone works within their schedule time range.
+        Args:
+            users: only add the constraints of the users with these ids
         """
-        for u in self.schedule.users:
+        a = self.schedule.arrays
+        length = a.length.tolist()
+        for u in self.each_user(users):
             worktime = 0
-            for s in self.schedule.shifts:
-                if (s.id,u.id) in self.variables:
-                    worktime += self.variables[s.id, u.id] * s.length.seconds
+            for s in self.schedule.shifts_of_user.get(u.id, []):
+                worktime += self.variables[s.id, u.id] * length[a.index[s.id]]
             self.AddLinearConstraint(worktime, int(u.min_hours*60*60), int(u.max_hours*60*60))
 
-    def AddLongShifts(self):
+    @measured
+    def AddLongShifts(self, users: Optional[Iterable[UserId]] = None):
         """Make sure that everyone works at least n long shifts.
         Args:
-            n: the number of shifts one needs to work
+            users: only add the constraints of the users with these ids
         """
-        for u in self.schedule.users:
+        for u in self.each_user(users):
+            user_shifts = self.schedule.shifts_of_user.get(u.id, [])
             if u.only_long:
                 self.Add(
-                    sum([self.variables[s.id,u.id] for s in self.schedule.shifts if not s.is_long]) == 0
+                    sum([self.variables[s.id,u.id] for s in user_shifts if not s.is_long]) == 0
                 )
             elif u.min_long > 0:
                 self.Add(
-                    sum([self.variables[s.id,u.id] for s in self.schedule.shifts if s.is_long]) > u.min_long    
+                    sum([self.variables[s.id,u.id] for s in user_shifts if s.is_long]) > u.min_long    
                 )
 
-    def AddLongShiftBreak(self):
+    @measured
+    def AddLongShiftBreak(self, users: Optional[Iterable[UserId]] = None):
         """Make sure that if you work a long shift, you're not gonna work
         another shift on the same day.
+        Args:
+            users: only add the constraints of the users with these ids
         """
-        for u in self.schedule.users:
-            for s in self.schedule.shifts:
-                if s.is_long and (s.id,u.id) in self.variables:
+        for u in self.each_user(users):
+            for s in self.schedule.shifts_of_user.get(u.id, []):
+                if s.is_long:
                     # Technically: for each long shift, if p works on that long shift, 
                     # Make sure that for that day,
                     # The number of shifts worked for that person is exactly one.
                     self.Add(sum([(
                         self.variables[other_s.id,u.id]) 
-                        for other_s in self.schedule.shifts_for_day[s.begin.date()]
-                        if (other_s.id,u.id) in self.variables]
+                        for other_s in self.schedule.shifts_of_user_for_day[u.id][s.begin.date()]]
                     ) == 1).OnlyEnforceIf(self.variables[s.id, u.id])
 
-    def AddNoConflict(self):
+    @measured
+    def AddNoConflict(self, users: Optional[Iterable[UserId]] = None):
         """Make sure that no one has two shifts on a day that overlap.
+        Args:
+            users: only add the constraints of the users with these ids
         """
-        conflicting_pairs = set() # assuming every day has the same shifts
-        for shift1, shift2 in combinations(self.schedule.shifts, r=2):
-            if shift1 & shift2: # bitwise and -> overlaps
-                conflicting_pairs.add((shift1.id,shift2.id))
+        if self.encoding == 'clique':
+            self.AddCliques(timedelta(0), timedelta(0), users)
+            return
+        if self.encoding == 'nooverlap':
+            self.AddUserNoOverlap(timedelta(0), timedelta(0), users)
+            return
+        overlapping = self.get_overlapping_shifts()
 
-        for u in self.schedule.users:
-            for s1_id, s2_id in conflicting_pairs:
-                # Both of them can't be assigned to the same person
-                # => their sum is less than 2
-                if (s1_id,u.id) in self.variables and (s2_id,u.id) in self.variables:
+        for u in self.each_user(users):
+            user_shift_ids = {s.id for s in self.schedule.shifts_of_user.get(u.id, [])}
+            for s1_id in user_shift_ids:
+                for s2_id in overlapping[s1_id] & user_shift_ids:
+                    # Both of them can't be assigned to the same person
+                    # => their sum is less than 2
                     self.Add(self.variables[s1_id,u.id] + self.variables[s2_id,u.id] < 2)
 
-    def AddSleep(self):
+    @measured
+    def AddSleep(self, users: Optional[Iterable[UserId]] = None):
         """Make sure that no one has a shift in the morning,
         if they had a shift last evening.
+        With the clique encoding, the cliques of AddNoConflict are replaced,
+        and with the nooverlap encoding, its intervals are extended by the rest period.
+        Args:
+            users: only add the constraints of the users with these ids
         """
-        conflicting_pairs = self.get_nosleep_shifts()
+        if self.encoding == 'clique':
+            # Extending each shift with the rest after it turns rest violations into overlaps
+            self.AddCliques(timedelta(hours=11), timedelta(hours=9), users)
+            return
+        if self.encoding == 'nooverlap':
+            self.AddUserNoOverlap(timedelta(hours=11), timedelta(hours=9), users)
+            return
+        following = dict()
+        for s1, s2 in self.get_nosleep_shifts():
+            following.setdefault(s1, set()).add(s2)
 
-        for u in self.schedule.users:
-            for s1, s2 in conflicting_pairs:
-                if (s1,u.id) in self.variables and (s2,u.id) in self.variables:
+        for u in self.each_user(users):
+            user_shift_ids = {s.id for s in self.schedule.shifts_of_user.get(u.id, [])}
+            for s1 in user_shift_ids:
+                for s2 in following.get(s1, set()) & user_shift_ids:
                     # Both of them can't be assigned to the same person
                     # => their sum is less than 2
                     self.Add(self.variables[s1,u.id] + self.variables[s2, u.id] < 2)
 
-    def AddNonFulltimerMaxShifts(self, n: int):
+    def AddCliques(self, long_rest: timedelta, rest: timedelta, users: Optional[Iterable[UserId]] = None):
+        """For each user, add an AtMostOne for each maximal clique of their shifts,
+        where two shifts conflict if they overlap after extending them with the rest period.
+        Calling it again clears the users' cliques of the previous call, as padding
+        only makes the intervals longer, so each of them is within one of the new cliques.
+        Args:
+            long_rest: the rest period after long shifts
+            rest: the rest period after other shifts
+            users: only add the constraints of the users with these ids
+        """
+        a = self.schedule.arrays
+        padded_end = (a.end + np.where(a.is_long, int(long_rest.total_seconds()), int(rest.total_seconds()))).tolist()
+        begin = a.begin.tolist()
+        constraints = self.Proto().constraints
+        for u in self.each_user(users):
+            for index in self.cliques.pop(u.id, []):
+                constraints[index].Clear()
+            intervals = []
+            for shift in self.schedule.shifts_of_user.get(u.id, []):
+                row = a.index[shift.id]
+                intervals.append((begin[row], padded_end[row], shift.id))
+            for clique in maximal_cliques(intervals):
+                if len(clique) > 1:
+                    ct = self.AddAtMostOne([self.variables[shift_id, u.id] for shift_id in clique])
+                    self.cliques.setdefault(u.id, []).append(ct.Index())
+
+    def AddUserNoOverlap(self, long_rest: timedelta, rest: timedelta, users: Optional[Iterable[UserId]] = None):
+        """For each user, create an optional interval for each of their shifts,
+        present if they work it, and extended with the rest period after it,
+        then make sure that the intervals of the user don't overlap.
+        Calling it again extends the intervals of the users' NoOverlap constraints in place,
+        so there stays a single one and a single interval for each shift of each user.
+        Args:
+            long_rest: the rest period after long shifts
+            rest: the rest period after other shifts
+            users: only add the constraints of the users with these ids
+        """
+        a = self.schedule.arrays
+        origin = a.begin.min()
+        starts = (a.begin - origin).tolist()
+        # Touching shifts conflict, but touching intervals don't overlap,
+        # so the intervals are extended by a second
+        ends = (a.end - origin + np.where(a.is_long, int(long_rest.total_seconds()), int(rest.total_seconds())) + 1).tolist()
+        constraints = self.Proto().constraints
+        for u in self.each_user(users):
+            if u.id in self.intervals:
+                for row, index in self.intervals[u.id]:
+                    interval = constraints[index].interval
+                    interval.size = self.NewConstant(ends[row] - starts[row]).Index()
+                    interval.end = self.NewConstant(ends[row]).Index()
+                continue
+            user_shifts = self.schedule.shifts_of_user.get(u.id, [])
+            if len(user_shifts) < 2:
+                continue
+            intervals = []
+            for shift in user_shifts:
+                row = a.index[shift.id]
+                start, end = starts[row], ends[row]
+                intervals.append((row, self.NewOptionalIntervalVar(
+                    start, end - start, end, self.variables[shift.id, u.id], f'{u.id} works {shift.id} interval')))
+            self.intervals[u.id] = [(row, interval.Index()) for row, interval in intervals]
+            self.AddNoOverlap([interval for _, interval in intervals])
+
+    def AddAtMostOne(self, literals: List[cp_model.IntVar]) -> cp_model.Constraint:
+        """Make sure that at most one of the literals is true.
+        The pinned ortools version has no wrapper for the at_most_one constraint,
+        so it's written to the model proto directly.
+        """
+        ct = cp_model.Constraint(self.Proto().constraints)
+        ct.Proto().at_most_one.literals.extend([literal.Index() for literal in literals])
+        return ct
+
+    @measured
+    def AddNonFulltimerMaxShifts(self, n: int, users: Optional[Iterable[UserId]] = None):
         """Make sure that non-fulltimers (people who can take non-long shifts)
         Can take at most n shifts.
+        Args:
+            users: only add the constraints of the users with these ids
         """
-        for u in self.schedule.users:
+        for u in self.each_user(users):
             if not u.only_long:
                 self.AddLinearConstraint(
-                    sum([self.variables[s.id,u.id] for s in self.schedule.shifts if (s.id,u.id) in self.variables]),
+                    sum([self.variables[s.id,u.id] for s in self.schedule.shifts_of_user.get(u.id, [])]),
                     0, 
                     n)
 
@@ -131,39 +529,333 @@ class ShiftModel(cp_model.CpModel):
         """Maximize the welfare of the employees.
         This target will minimize the dissatisfaction of the employees
         with their assigned shift.
+        The objective terms are counted as its literals in build_stats.
+        """
+        with self.measure('MaximizeWelfare'):
+            self.Minimize(
+                sum([works*self.schedule.preference[shift,user] for (shift, user), works in self.variables.items()])
+            )
+        self.build_stats.families['MaximizeWelfare']['literals'] += len(self.Proto().objective.vars)
+
+    def AddHints(self, values: Dict[Tuple[ShiftId, Any], int]):
+        """Use a previous assignment as a solution hint,
+        replacing the hints set before.
+        Args:
+            values: assigned[shift_id, person_id] = True | False
         """
-        self.Minimize(
-            sum([works*self.schedule.preference[shift,user] for (shift, user), works in self.variables.items()])
-        )
+        self.ClearHints()
+        for key, assigned in values.items():
+            if key in self.variables:
+                self.AddHint(self.variables[key], int(assigned))
 
     # Helper methods
-    def get_nosleep_shifts(self) -> Set[Tuple[Shift,Shift]]:
+    def get_overlapping_shifts(self) -> Dict[ShiftId, Set[ShiftId]]:
+        """Collect the pairs of shifts that overlap (touching counts as overlap),
+        by sweeping over the shifts in order of begin time,
+        keeping the shifts that haven't ended yet.
+        Returns:
+            dict[shift_id] = {ids of overlapping shifts that come after it in schedule.shifts}
+        """
+        a = self.schedule.arrays
+        ids = a.ids.tolist()
+        begin = a.begin.tolist()
+        end = a.end.tolist()
+        overlapping = {shift_id:set() for shift_id in ids}
+        active = [] # rows of the shifts that haven't ended yet
+        for row in np.argsort(a.begin, kind='stable').tolist():
+            active = [other for other in active if end[other] >= begin[row]]
+            for other in active:
+                # Rows are positions in schedule.shifts
+                if other < row:
+                    overlapping[ids[other]].add(ids[row])
+                else:
+                    overlapping[ids[row]].add(ids[other])
+            active.append(row)
+        return overlapping
+
+    def get_nosleep_shifts(self) -> Set[Tuple[ShiftId,ShiftId]]:
         """Collect pairs of shifts that conflict in the following way:
         The time between the end of one and the begin of the other is
         less than 11 hours for long shifts, and 9 hours for non-long.
+        The result is cached on the schedule.
         """
-        conflicting = set()
-        for shift, other_shift in permutations(self.schedule.shifts, r=2):
-            if shift.end < other_shift.begin:
-                offtime_between = other_shift.begin - shift.end
-                if shift.is_long:
-                    if timedelta(0) <= offtime_between <= timedelta(hours=11):
-                        conflicting.add((shift.id, other_shift.id))
-                else:
-                    if timedelta(0) <= offtime_between <= timedelta(hours=9):
-                        conflicting.add((shift.id, other_shift.id))
-        return conflicting
+        return self.schedule.nosleep_shifts
+
+class SolutionSnapshot:
+    """The KPIs of a solution, computed in a single pass over its assignment.
+    The assignment is kept as arrays aligned with keys, and no array is writable.
+    Hours count every capacity of a shift, so that the filled and unfilled hours add up to them.
+    """
+    __slots__ = ('keys', 'shift_rows', 'user_rows', 'assigned', 'priority', 'objective',
+        'shift_filled', 'shift_unfilled', 'user_hours', 'empty_shifts',
+        'n_capacities', 'filled_capacities', 'unfilled_capacities',
+        'hours', 'filled_hours', 'unfilled_hours', 'priority_counts')
+    def __init__(self, schedule: Schedule, values: Dict[Tuple[ShiftId, UserId], int], objective: Optional[float] = None):
+        """Args:
+            schedule: the Schedule solved
+            values: assigned[shift_id, person_id] = True | False
+            objective: the objective value, by default the sum of the priorities assigned
+        """
+        a = schedule.arrays
+        user_index = {u.id:i for i, u in enumerate(schedule.users)}
+        self.keys = tuple(values)
+        n = len(self.keys)
+        self.shift_rows = np.fromiter((a.index[shift_id] for shift_id, _ in self.keys), dtype=np.int64, count=n)
+        self.user_rows = np.fromiter((user_index[user_id] for _, user_id in self.keys), dtype=np.int64, count=n)
+        self.assigned = np.fromiter((values[key] for key in self.keys), dtype=bool, count=n)
+        self.priority = np.fromiter((schedule.preference[key] for key in self.keys), dtype=np.int64, count=n)
+        taken = self.shift_rows[self.assigned]
+        self.shift_filled = np.bincount(taken, minlength=len(schedule.shifts))
+        self.shift_unfilled = a.capacity - self.shift_filled
+        self.user_hours = np.bincount(self.user_rows[self.assigned], weights=a.length[taken], minlength=len(schedule.users)) / (60*60)
+        self.__freeze()
+        self.empty_shifts = int((self.shift_filled == 0).sum())
+        self.n_capacities = int(a.capacity.sum())
+        self.filled_capacities = int(self.shift_filled.sum())
+        self.unfilled_capacities = self.n_capacities - self.filled_capacities
+        self.hours = float((a.capacity * a.length).sum()) / (60*60)
+        self.filled_hours = float((self.shift_filled * a.length).sum()) / (60*60)
+        self.unfilled_hours = self.hours - self.filled_hours
+        priorities, counts = np.unique(self.priority[self.assigned], return_counts=True)
+        self.priority_counts = dict(zip(priorities.tolist(), counts.tolist())) # priority_counts[priority] = n assigned
+        self.objective = float(self.priority[self.assigned].sum()) if objective is None else objective
+
+    def __freeze(self):
+        for array in (self.shift_rows, self.user_rows, self.assigned, self.priority, self.shift_filled, self.shift_unfilled, self.user_hours):
+            array.setflags(write=False)
+
+    def __setstate__(self, state):
+        # Unpickled arrays are writable again
+        _, slots = state
+        for name, value in slots.items():
+            setattr(self, name, value)
+        self.__freeze()
+
+    @property
+    def values(self) -> Dict[Tuple[ShiftId, UserId], int]:
+        """assigned[shift_id, person_id] = True | False"""
+        return dict(zip(self.keys, self.assigned.astype(int).tolist()))
+
+    @property
+    def pref_modes(self) -> List[int]:
+        """The most frequent priorities assigned"""
+        most = max(self.priority_counts.values(), default=0)
+        return [p for p, count in self.priority_counts.items() if count == most]
+
+class IntermediateSolution:
+    """A solution found during the search.
+    Its values are only read from the search when they are first accessed,
+    which has to be within the callback it was passed to.
+    """
+    def __init__(self, min_capacities_filled: int, objective: float, bound: float, wall_time: float,
+            values: Union[Dict[Tuple[ShiftId, UserId], int], Callable[[], Dict[Tuple[ShiftId, UserId], int]]]):
+        """Args:
+            min_capacities_filled: the level being solved
+            objective: the objective value of the solution
+            bound: the best bound on the objective known when it was found
+            wall_time: seconds since the start of the search
+            values: assigned[shift_id, person_id] = True | False, or a function reading it
+        """
+        self.min_capacities_filled = min_capacities_filled
+        self.objective = objective
+        self.bound = bound
+        self.wall_time = wall_time
+        self.__values = values
+
+    @property
+    def values(self) -> Dict[Tuple[ShiftId, UserId], int]:
+        """assigned[shift_id, person_id] = True | False"""
+        if callable(self.__values):
+            self.__values = self.__values()
+        return self.__values
+
+class SolutionObserver(cp_model.CpSolverSolutionCallback):
+    """Observes the improving solutions of a search:
+    records the wall time at which the first one was found,
+    and optionally stops the search there.
+    With on_solution, every improving solution is passed to it
+    as an IntermediateSolution, and the search stops if it returns True.
+    """
+    def __init__(self, stop_search: bool = False, on_solution: Optional[Callable[[IntermediateSolution], Optional[bool]]] = None,
+            model: Optional["ShiftModel"] = None):
+        """Args:
+            stop_search: stop at the first solution
+            on_solution: called with each solution
+            model: the model being solved, needed with on_solution
+        """
+        super().__init__()
+        self.first_solution_time = None
+        self.stop_search = stop_search
+        self.on_solution = on_solution
+        self.model = model
+    def OnSolutionCallback(self):
+        if self.first_solution_time is None:
+            self.first_solution_time = self.WallTime()
+        if self.on_solution is not None:
+            solution = IntermediateSolution(
+                min_capacities_filled=self.model.GetMinimumCapacityFilledNumber(),
+                objective=self.ObjectiveValue(),
+                bound=self.BestObjectiveBound(),
+                wall_time=self.WallTime(),
+                values=lambda: {key:self.Value(var) for key, var in self.model.variables.items()})
+            if self.on_solution(solution):
+                self.StopSearch()
+        if self.stop_search:
+            self.StopSearch()
 
 class ShiftSolver(cp_model.CpSolver):
-    def __init__(self, schedule: Schedule):
+    # Constraint families added after the minimum capacity and the objective, in order, with their arguments
+    CONSTRAINTS = (
+        ('AddShiftCapacity', ()),
+        ('AddLongShiftBreak', ()),
+        ('AddSleep', ()),
+        ('AddMinMaxWorkTime', ()),
+        ('AddMaxDailyShifts', (1,)),
+        ('AddNonFulltimerMaxShifts', (5,)),
+    )
+
+    def __init__(self, schedule: Schedule, trace_memory: bool = False, parameters: Optional[Dict[str, Any]] = None,
+            model_cache: Optional[ModelCache] = None, solution_store: Optional[SolutionStore] = None):
         """Args:
             schedule: the Schedule to solve for
+            trace_memory: record the peak Python heap of building each constraint family in BuildStats
+            parameters: CP-SAT parameters, see SetParameters
+            model_cache: load the models from, and store them in this cache
+            solution_store: answer the levels solved to optimality before from this store,
+                hint the ones solved to feasibility with their stored solution,
+                and store the best solution of each level in it
         """
         super().__init__()
         self.schedule=schedule
+        self.trace_memory = trace_memory
+        self.model_cache = model_cache
+        self.solution_store = solution_store
         self.__model = None
+        self.__level = None
+        self.__encoding = None
+        self.__answered = None # the stored solution the last level was answered with
+        self.__first_solution_time = None
+        self.__snapshot = None
+        if parameters is not None:
+            self.SetParameters(parameters)
+
+    def SetParameters(self, parameters: Dict[str, Any]):
+        """Set CP-SAT search parameters by name, e.g.
+        {'num_search_workers': 8, 'linearization_level': 2, 'cp_model_presolve': False,
+        'symmetry_level': 2, 'random_seed': 0}
+        The timeout of the solve methods overrides max_time_in_seconds.
+        Raises:
+            ValueError: for a name that isn't a parameter of the installed CP-SAT
+        """
+        fields = self.parameters.DESCRIPTOR.fields_by_name
+        for name, value in parameters.items():
+            if name not in fields:
+                raise ValueError(f'Unknown CP-SAT parameter {name}')
+            setattr(self.parameters, name, value)
     
-    def Solve(self, min_capacities_filled: int = 0, timeout: Optional[int]=None) -> bool:
+    def __build_model(self, min_capacities_filled: int, encoding: str = 'pairwise'):
+        """Create the model with every constraint family,
+        or load it from the model cache if it was built before.
+        """
+        key = None
+        cached = None
+        if self.model_cache is not None:
+            key = self.model_cache.key(self.schedule, {'encoding': encoding, 'constraints': self.CONSTRAINTS})
+            cached = self.model_cache.get(key)
+        self.__model = ShiftModel(self.schedule, encoding=encoding, trace_memory=self.trace_memory, cached=cached)
+        if cached is not None:
+            self.__model.SetMinimumCapacityFilledNumber(min_capacities_filled)
+            return
+        self.__model.AddMinimumCapacityFilledNumber(n=min_capacities_filled)
+        self.__model.MaximizeWelfare()
+        for name, args in self.CONSTRAINTS:
+            getattr(self.__model, name)(*args)
+        if key is not None:
+            self.model_cache.put(key, self.__model.Proto().SerializeToString(), self.__model.min_capacity_index)
+
+    def BuildModel(self, min_capacities_filled: int = 0, encoding: str = 'pairwise'):
+        """Build the model without solving it, e.g. to time building and solving separately.
+        SolveLevel then solves it.
+        """
+        self.__build_model(min_capacities_filled, encoding)
+
+    def __solve_level(self, min_capacities_filled: int, timeout: Optional[int], hint: Optional[dict] = None, encoding: str = 'pairwise',
+            stop_at_first_solution: bool = False, on_solution: Optional[Callable[[IntermediateSolution], Optional[bool]]] = None) -> bool:
+        """Answer a level from the solution store if it was solved to optimality before,
+        without building a model. Otherwise solve it on the current model, moving its bound,
+        or on a new one if there is none, and store its solution.
+        Args:
+            min_capacities_filled: the level to solve
+            timeout: number of seconds that the solver can take
+            hint: assigned[shift_id, person_id] = True | False, a previous solution to start from
+            encoding: one of ENCODINGS, used when a model is built
+            stop_at_first_solution: only look for a feasible solution
+            on_solution: called with each improving solution, stops the search by returning True
+        Returns:
+            Boolean: whether the solver found a solution.
+        """
+        self.__level = min_capacities_filled
+        self.__encoding = encoding if self.__model is None else self.__model.encoding
+        key = None
+        stored = None
+        if self.solution_store is not None:
+            # Solutions don't depend on the encoding, so it's left out of the key
+            key = self.solution_store.key(self.schedule, {'constraints': self.CONSTRAINTS}, min_capacities_filled)
+            stored = self.solution_store.get(key)
+        if stored is not None and stored['status'] == 'OPTIMAL':
+            self.__answer(min_capacities_filled, stored, on_solution)
+            return True
+        if self.__model is None:
+            self.__build_model(min_capacities_filled, encoding)
+        else:
+            self.__model.SetMinimumCapacityFilledNumber(min_capacities_filled)
+        if stored is not None:
+            hint = stored['values']
+        found = self.__search(timeout, hint, stop_at_first_solution, on_solution)
+        if key is not None and found and (stored is None or self.StatusName() == 'OPTIMAL' or self.ObjectiveValue() < stored['objective']):
+            self.solution_store.put(key, self.StatusName(), self.ObjectiveValue(), self.Values)
+        return found
+
+    def __answer(self, min_capacities_filled: int, stored: dict, on_solution: Optional[Callable] = None):
+        """Take an optimal solution from the solution store as the solution of the level.
+        The status is OPTIMAL, the search statistics are zero, and on_solution is called with it.
+        """
+        self.__answered = stored
+        self.__first_solution_time = 0.0
+        self.__snapshot = SolutionSnapshot(self.schedule, stored['values'], stored['objective'])
+        if on_solution is not None:
+            on_solution(IntermediateSolution(
+                min_capacities_filled=min_capacities_filled,
+                objective=stored['objective'],
+                bound=stored['objective'],
+                wall_time=0.0,
+                values=stored['values']))
+
+    def __search(self, timeout: Optional[int], hint: Optional[dict] = None, stop_at_first_solution: bool = False,
+            on_solution: Optional[Callable] = None) -> bool:
+        """Run CP-SAT on the current model, with the arguments of __solve_level
+        Returns:
+            Boolean: whether the solver found a solution.
+        """
+        if timeout is not None:
+            self.parameters.max_time_in_seconds = timeout
+        if hint is None:
+            self.__model.ClearHints()
+        else:
+            self.__model.AddHints(hint)
+        observer = SolutionObserver(stop_search=stop_at_first_solution, on_solution=on_solution, model=self.__model)
+        self.__answered = None
+        super().SolveWithSolutionCallback(self.__model, observer)
+        self.__first_solution_time = observer.first_solution_time
+        self.__snapshot = None
+        if super().StatusName() in ('FEASIBLE', 'OPTIMAL'):
+            self.__snapshot = SolutionSnapshot(self.schedule,
+                {key:self.Value(var) for key, var in self.__model.variables.items()}, self.ObjectiveValue())
+            return True
+        return False
+
+    def Solve(self, min_capacities_filled: int = 0, timeout: Optional[int]=None, hint: Optional[dict]=None, encoding: str = 'pairwise',
+            on_solution: Optional[Callable[[IntermediateSolution], Optional[bool]]] = None) -> bool:
         """ 
         Args:
             min_workers: The minimum number of workers that have to be assigned to every shift
@@ -171,26 +863,104 @@ class ShiftSolver(cp_model.CpSolver):
             n_long_shifts: Number of long shifts for every worker
             pref_function: function that takes and returns an integer, used for weighting of the pref function
             timeout: number of seconds that the solver can take to find the optimal solution
+            hint: assigned[shift_id, person_id] = True | False, e.g. the Values of a previous solve
+            encoding: one of ENCODINGS, how conflicting shifts are encoded
+            on_solution: called with each improving solution as an IntermediateSolution,
+                stops the search by returning True
         Returns:
             Boolean: whether the solver found a solution.
         """
-        
-        self.__model = ShiftModel(self.schedule)
-        self.__model.AddMinimumCapacityFilledNumber(n=min_capacities_filled)
-        self.__model.MaximizeWelfare()
-        self.__model.AddShiftCapacity()
-        self.__model.AddLongShiftBreak()
-        self.__model.AddSleep()
-        self.__model.AddMinMaxWorkTime()
-        self.__model.AddMaxDailyShifts(1)
-        self.__model.AddNonFulltimerMaxShifts(5)
-        if timeout is not None:
-            self.parameters.max_time_in_seconds = timeout
-        super().Solve(self.__model)
-        if super().StatusName() in ('FEASIBLE', 'OPTIMAL'):
-            return True
-        return False
-    
+        self.__model = None
+        return self.__solve_level(min_capacities_filled, timeout, hint, encoding, on_solution=on_solution)
+
+    def SolveLevel(self, min_capacities_filled: int, timeout: Optional[int]=None, hint: Optional[dict]=None, encoding: str = 'pairwise',
+            on_solution: Optional[Callable[[IntermediateSolution], Optional[bool]]] = None) -> bool:
+        """Like Solve, but reuses the model of the previous solve if there is one,
+        only moving the bound of the minimum capacity constraint.
+        The encoding is only used when there is no model yet.
+        Returns:
+            Boolean: whether the solver found a solution.
+        """
+        return self.__solve_level(min_capacities_filled, timeout, hint, encoding, on_solution=on_solution)
+
+    def SolveSweep(self, capacities: Iterable[int], timeout: Optional[int]=None, warm_start: bool = True, encoding: str = 'pairwise',
+            on_solution: Optional[Callable[[IntermediateSolution], Optional[bool]]] = None,
+            reuse_model: bool = False) -> Iterator[Tuple[int, bool]]:
+        """Solve for several minimum capacity levels, building the model only once,
+        when the first level that isn't answered from the solution store is solved.
+        Between solves only the bound of the minimum capacity constraint is moved.
+        The solver holds the solution for the last yielded level,
+        so the usual accessors can be used before advancing the iterator.
+        Args:
+            capacities: the min_capacities_filled levels to solve for, in order
+            timeout: number of seconds that the solver can take on each level
+            warm_start: hint each level with the solution of the previous one
+            encoding: one of ENCODINGS, how conflicting shifts are encoded
+            on_solution: called with each improving solution of each level, see Solve
+            reuse_model: keep the model of a previous solve with the same encoding, e.g. of MaxFeasibleCapacity,
+                instead of building a new one
+        Yields:
+            (min_capacities_filled, whether the solver found a solution)
+        """
+        if not (reuse_model and self.__model is not None and self.__model.encoding == encoding):
+            self.__model = None
+        hint = None
+        for n in capacities:
+            found = self.__solve_level(n, timeout, hint, encoding, on_solution=on_solution)
+            if warm_start and found:
+                hint = self.Values
+            yield n, found
+
+    def SolveDelta(self, users: Optional[dict] = None, shifts: Optional[dict] = None, preferences: Optional[dict] = None,
+            timeout: Optional[int] = None) -> bool:
+        """Apply changes to the schedule with Schedule.apply_delta,
+        patch the model of the last solve only where they affect it,
+        and solve it again, with the last solution as a hint.
+        A model loaded from the model cache is rebuilt instead,
+        and one is built if the last solve was answered from the solution store.
+        Args:
+            users, shifts, preferences: the changes, see Schedule.apply_delta
+            timeout: number of seconds that the solver can take
+        Returns:
+            Boolean: whether the solver found a solution.
+        """
+        if self.__level is None:
+            raise ValueError('There is no model to patch, solve it first')
+        hint = self.Values if self.StatusName() in ('FEASIBLE', 'OPTIMAL') else None
+        changed_users, changed_shifts = self.schedule.apply_delta(users, shifts, preferences)
+        if self.__model is not None and self.__model.patchable:
+            self.__model.Patch((('AddNoConflict', ()),) + self.CONSTRAINTS, changed_users, changed_shifts)
+        else:
+            self.__model = None
+        return self.__solve_level(self.__level, timeout, hint, self.__encoding)
+
+    def MaxFeasibleCapacity(self, lowest: int, highest: int, timeout: Optional[int]=None, encoding: str = 'pairwise') -> Optional[int]:
+        """Find the highest feasible min_capacities_filled in [lowest, highest]
+        with a binary search, in O(log(highest-lowest)) solves on a single model.
+        Each probe stops at its first solution, and a probe that runs out of time
+        without finding one counts as infeasible.
+        Args:
+            lowest: the lowest level to consider
+            highest: the highest level to consider
+            timeout: number of seconds that the solver can take on each probe
+            encoding: one of ENCODINGS, how conflicting shifts are encoded
+        Returns:
+            the highest feasible level, or None if even lowest is infeasible
+        """
+        self.__model = None
+        best = None
+        hint = None
+        while lowest <= highest:
+            mid = (lowest + highest) // 2
+            if self.__solve_level(mid, timeout, hint, encoding, stop_at_first_solution=True):
+                hint = self.Values
+                # The solution found may fill more than required
+                best = max(mid, min(sum(hint.values()), highest))
+                lowest = best + 1
+            else:
+                highest = mid - 1
+        return best
+
     def get_overview(self):
         return self.get_shift_workers() + self.get_employees_hours()
 
@@ -200,12 +970,12 @@ class ShiftSolver(cp_model.CpSolver):
             Multiline string
         """
         txt = ''
-        for shift in self.__model.schedule.shifts:
+        values = self.Values
+        for shift in self.schedule.shifts:
             txt += f'{shift}'
             txt += ''.join(
-                [f'\n\t{u.id} p={self.__model.schedule.preference[shift.id,u.id]}' for u in self.schedule.users 
-                if (shift.id,u.id) in self.__model.variables 
-                and self.Value(self.__model.variables[shift.id,u.id])])
+                [f'\n\t{u.id} p={self.schedule.preference[shift.id,u.id]}' for u in self.schedule.users_of_shift.get(shift.id, [])
+                if values[shift.id,u.id]])
             txt += '\n'
         return txt
 
@@ -215,25 +985,90 @@ class ShiftSolver(cp_model.CpSolver):
             Multiline string
         """
         txt = str()
-        for u in self.__model.schedule.users:
-            work_hours=0
-            for shift in self.__model.schedule.shifts:
-                if (shift.id,u.id) in self.__model.variables:
-                    work_hours += self.Value(self.__model.variables[shift.id,u.id]) * shift.length.seconds / (60*60)
+        for u, work_hours in zip(self.schedule.users, self.Snapshot.user_hours.tolist()):
             txt += f'{u.id} works {round(u.min_hours, 2)}<={round(work_hours, 2)}<={round(u.max_hours, 2)} hours.\n'
         return txt
 
+    # The search statistics of a level answered from the solution store
+    def StatusName(self, status=None) -> str:
+        if status is None and self.__answered is not None:
+            return 'OPTIMAL'
+        return super().StatusName(status)
+
+    def ObjectiveValue(self) -> float:
+        if self.__answered is not None:
+            return self.__answered['objective']
+        return super().ObjectiveValue()
+
+    def BestObjectiveBound(self) -> float:
+        if self.__answered is not None:
+            return self.__answered['objective']
+        return super().BestObjectiveBound()
+
+    def WallTime(self) -> float:
+        return 0.0 if self.__answered is not None else super().WallTime()
+
+    def UserTime(self) -> float:
+        return 0.0 if self.__answered is not None else super().UserTime()
+
+    def NumBranches(self) -> int:
+        return 0 if self.__answered is not None else super().NumBranches()
+
+    def NumConflicts(self) -> int:
+        return 0 if self.__answered is not None else super().NumConflicts()
+
     @property
     def Values(self) -> dict:
         """Returns a dictionary with the solver values.
         Returns:
             assigned[shift_id, person_id] = True | False
         """
-        assigned = dict()
-        for s,p in self.__model.variables.keys():
-            assigned[s,p] = self.Value(self.__model.variables[s,p])
-        
-        return assigned
+        return self.Snapshot.values
+
+    @property
+    def Snapshot(self) -> Optional[SolutionSnapshot]:
+        """The KPIs of the solution of the last solve, None if there is none"""
+        return self.__snapshot
+
+    @property
+    def Model(self) -> Optional[ShiftModel]:
+        """The model of the last solve"""
+        return self.__model
+
+    @property
+    def BuildStats(self) -> Optional[BuildStats]:
+        """Time, size and memory of building each constraint family of the model"""
+        return None if self.__model is None else self.__model.build_stats
+
+    @property
+    def SolveStats(self) -> dict:
+        """CP-SAT's statistics of the last solve"""
+        found = self.StatusName() in ('FEASIBLE', 'OPTIMAL')
+        return {
+            'status': self.StatusName(),
+            'wall_time': self.WallTime(),
+            'user_time': self.UserTime(),
+            'first_solution_time': self.FirstSolutionTime,
+            'objective': self.ObjectiveValue() if found else None,
+            'bound': self.BestObjectiveBound() if found else None,
+            'branches': self.NumBranches(),
+            'conflicts': self.NumConflicts(),
+        }
+
+    @property
+    def Stats(self) -> dict:
+        """The build stats of the model and the solve stats of the last solve"""
+        return {
+            'build': None if self.BuildStats is None else self.BuildStats.to_dict(),
+            'solve': self.SolveStats,
+        }
+
+    @property
+    def FirstSolutionTime(self) -> Optional[float]:
+        """Wall time in seconds until the first solution of the last solve,
+        None if no solution was found.
+        """
+        return self.__first_solution_time
 
     @property
     def PrefScore(self) -> float:
@@ -241,44 +1076,91 @@ class ShiftSolver(cp_model.CpSolver):
 
     @property
     def NShifts(self) -> int:
-        return len(self.__model.schedule.shifts)
+        return len(self.schedule.shifts)
 
     @property
     def UnfilledCapacities(self) -> int:
-        assigned = self.Values
-        unfilled_capacities = 0
-        for s in self.__model.schedule.shifts:
-            unfilled_capacities += (s.capacity- sum([assigned[s.id,u.id] for u in self.__model.schedule.users if (s.id,u.id) in assigned]))
-        return unfilled_capacities
-    
+        return self.Snapshot.unfilled_capacities
     @property
     def FilledCapacities(self) -> int:
-        return self.NCapacities - self.UnfilledCapacities
+        return self.Snapshot.filled_capacities
     @property
     def NCapacities(self) -> int:
-        capacities = 0
-        for shift in self.__model.schedule.shifts:
-            capacities += shift.capacity
-        return capacities
+        return int(self.schedule.arrays.capacity.sum())
     @property
     def UnfilledHours(self) -> float:
-        assigned = self.Values
-        unfilled_hours = 0
-        for shift in self.__model.schedule.shifts:
-            unfilled_capacities_on_this_shift = (shift.capacity - sum([assigned[shift.id,u.id] for u in self.__model.schedule.users if (shift.id,u.id) in assigned]))
-            length_of_shift_in_hours = shift.length.seconds / (60*60)
-            unfilled_hours += unfilled_capacities_on_this_shift * length_of_shift_in_hours
-        return unfilled_hours
+        return self.Snapshot.unfilled_hours
     @property
     def FilledHours(self) -> float:
-        return self.Hours - self.UnfilledHours
+        return self.Snapshot.filled_hours
     @property
     def Hours(self) -> float:
-        n_hours = 0
-        for shift in self.__model.schedule.shifts:
-            n_hours += shift.length.seconds / (60*60)
-        return n_hours
+        """Hours of every capacity of every shift"""
+        a = self.schedule.arrays
+        return float((a.capacity * a.length).sum()) / (60*60)
 
     @property
     def NPeople(self) -> int:
-        return len(self.__model.people)
+        return len(self.schedule.users)
+    @property
+    def EmptyShifts(self) -> int:
+        return self.Snapshot.empty_shifts
+    @property
+    def PrefModes(self) -> List[int]:
+        return self.Snapshot.pref_modes
+
+class LevelResult:
+    """Compact, picklable record of the result of solving a capacity level,
+    with the same accessors as the ShiftSolver it was taken from.
+    It keeps the SolutionSnapshot, but not the model or the schedule.
+    """
+    def __init__(self, solver: ShiftSolver, min_capacities_filled: int):
+        self.min_capacities_filled = min_capacities_filled
+        self.found = solver.StatusName() in ('FEASIBLE', 'OPTIMAL')
+        self._status_name = solver.StatusName()
+        self._wall_time = solver.WallTime()
+        self.FirstSolutionTime = solver.FirstSolutionTime
+        self.NShifts = solver.NShifts
+        self.NCapacities = solver.NCapacities
+        self.Hours = solver.Hours
+        self.NPeople = solver.NPeople
+        self.Stats = solver.Stats
+        self.Snapshot = solver.Snapshot if self.found else None
+
+    def StatusName(self) -> str:
+        return self._status_name
+
+    def WallTime(self) -> float:
+        return self._wall_time
+
+    @property
+    def Values(self) -> Dict[Tuple[ShiftId, UserId], int]:
+        return self.Snapshot.values
+
+    @property
+    def PrefScore(self) -> float:
+        return self.Snapshot.objective
+
+    @property
+    def PrefModes(self) -> List[int]:
+        return self.Snapshot.pref_modes
+
+    @property
+    def EmptyShifts(self) -> int:
+        return self.Snapshot.empty_shifts
+
+    @property
+    def UnfilledCapacities(self) -> int:
+        return self.Snapshot.unfilled_capacities
+
+    @property
+    def FilledCapacities(self) -> int:
+        return self.Snapshot.filled_capacities
+
+    @property
+    def UnfilledHours(self) -> float:
+        return self.Snapshot.unfilled_hours
+
+    @property
+    def FilledHours(self) -> float:
+        return self.Snapshot.filled_hours